@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for the Jenkins controller image.
+
+Builds the controller image for each plugin profile, boots it locally in
+Docker with the memory and CPU of a controller size profile, and measures the
+time from ``docker run`` to the first HTTP 200 from ``/login``. CasC renders
+from stub values, so no AWS resources are needed; the ECS cloud is configured
+but never used.
+
+    python benchmarks/controller_startup.py                         # full and minimal
+    python benchmarks/controller_startup.py --plugin-profile minimal --repeat 5
+    python benchmarks/controller_startup.py --controller-profile medium --no-build
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONTEXT = os.path.join(ROOT, "infrastructure", "docker", "jenkins-controller")
+
+sys.path.insert(0, os.path.join(ROOT, "infrastructure", "infrastructure"))
+from controller import CONTROLLER_PROFILES, PLUGIN_PROFILES, controller_java_opts  # noqa: E402
+
+# Enough for modify_casc.py to render a valid configuration
+ENVIRONMENT = {
+    "CASC_JENKINS_CONFIG": "/jenkins.yaml",
+    "cluster_arn": "arn:aws:ecs:us-east-1:123456789012:cluster/benchmark",
+    "aws_region": "us-east-1",
+    "jenkins_url": "http://localhost:8080/",
+    "subnet_ids": "subnet-00000000000000001,subnet-00000000000000002",
+    "security_group_ids": "sg-00000000000000001",
+    "execution_role_arn": "arn:aws:iam::123456789012:role/benchmark-execution",
+    "task_role_arn": "arn:aws:iam::123456789012:role/benchmark-task",
+    "agent_image": "jenkins/inbound-agent:4.10-3-jdk11",
+    "worker_log_group": "benchmark",
+    "worker_log_stream_prefix": "benchmark",
+}
+
+
+def build(plugins: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [
+            "docker",
+            "build",
+            "--build-arg",
+            f"PLUGIN_FILE={PLUGIN_PROFILES[plugins]}",
+            "-t",
+            f"jenkins-controller:{plugins}",
+            CONTEXT,
+        ],
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def boot(plugins: str, size: dict, timeout: int) -> dict:
+    """Starts one controller and returns the seconds until `/login` answers 200."""
+    environment = dict(ENVIRONMENT)
+    environment["JAVA_OPTS"] = " ".join(
+        controller_java_opts() + ["-Djenkins.install.runSetupWizard=false"]
+    )
+
+    command = ["docker", "run", "-d", "-p", "127.0.0.1::8080"]
+    command += ["--memory", f"{size['memory']}m", "--cpus", str(size["cpu"] / 1024)]
+    for name, value in environment.items():
+        command += ["-e", f"{name}={value}"]
+    command.append(f"jenkins-controller:{plugins}")
+
+    start = time.perf_counter()
+    container = subprocess.run(
+        command, check=True, stdout=subprocess.PIPE, universal_newlines=True
+    ).stdout.strip()
+
+    try:
+        port = subprocess.run(
+            ["docker", "port", container, "8080"],
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout.split(":")[-1].strip()
+
+        url = f"http://127.0.0.1:{port}/login"
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    if response.status == 200:
+                        break
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.5)
+        else:
+            raise SystemExit(f"{plugins}: /login not healthy after {timeout}s")
+        healthy = time.perf_counter() - start
+
+        stats = subprocess.run(
+            ["docker", "stats", "--no-stream", "--format", "{{.MemUsage}}", container],
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout.split("/")[0].strip()
+
+        return {"healthy_seconds": healthy, "memory": stats}
+    finally:
+        subprocess.run(["docker", "rm", "-f", container], stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plugin-profile", action="append", choices=sorted(PLUGIN_PROFILES))
+    parser.add_argument(
+        "--controller-profile", default="small", choices=sorted(CONTROLLER_PROFILES)
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=int, default=600)
+    parser.add_argument("--no-build", action="store_true", help="reuse the built images")
+    args = parser.parse_args()
+
+    size = CONTROLLER_PROFILES[args.controller_profile]
+    results = {}
+    for plugins in args.plugin_profile or sorted(PLUGIN_PROFILES):
+        result = {} if args.no_build else {"build_seconds": build(plugins)}
+        runs = [boot(plugins, size, args.timeout) for _ in range(args.repeat)]
+        result["healthy_seconds"] = statistics.median(run["healthy_seconds"] for run in runs)
+        result["healthy_seconds_max"] = max(run["healthy_seconds"] for run in runs)
+        result["memory"] = runs[-1]["memory"]
+        results[plugins] = result
+
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
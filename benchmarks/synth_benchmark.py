@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""Synth-time benchmark for the networking and infrastructure CDK apps.
+
+Each app is synthesized in offline mode (``CDK_OFFLINE=1``) in its own
+process: lookups are answered from the app's ``lookups.snapshot.json`` (for
+networking, the placeholder snapshot of its tests) and any boto3 client
+creation fails the run. For every app the wall time of each phase (jsii
+startup, construct tree, synthesis), the peak RSS of the process tree and, per
+stack, the construct count, resource count and template size are recorded and
+compared against the committed ``baseline.json``. A missing baseline, or an
+app missing from it, fails the comparison.
+
+    python benchmarks/synth_benchmark.py                  # compare to baseline
+    python benchmarks/synth_benchmark.py --write-baseline
+    python benchmarks/synth_benchmark.py --app infrastructure --profile out/
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+ACCOUNT = "420058945283"
+REGION = "us-east-1"
+
+APPS = {
+    "networking": {
+        "environment": {
+            "MANAGEMENT_ACCOUNT": "111111111111",
+            "ROOT_OU": "r-bench",
+            "NON_PRODUCTION_OU": "ou-bench-nonprod",
+            "SANDBOX_OU": "ou-bench-sandbox",
+            # No snapshot of a real account is committed for networking
+            "CDK_OFFLINE_SNAPSHOT": os.path.join(
+                ROOT, "networking", "tests", "lookups.snapshot.json"
+            ),
+        },
+    },
+    "infrastructure": {
+        "environment": {
+            "AWS_ACCOUNT": ACCOUNT,
+            "AWS_REGION": REGION,
+            "VPC_ID": "vpc-0d13a9949cc7ebb5c",
+            "INFRASTRUCTURE_SUBNET_1": "subnet-08788b393eac4a871",
+            "INFRASTRUCTURE_SUBNET_2": "subnet-0491589152201530a",
+            "JENKINS_SUBNET_1": "subnet-0865a0e75c3fd9f02",
+            "JENKINS_SUBNET_2": "subnet-0cb3f35899a541210",
+            "VPN_CLIENT_CIDR": "10.20.0.0/16",
+            "ADMIN_PASSWORD": "benchmark",
+        },
+    },
+}
+
+# Metrics compared against the baseline; counts are deterministic, so any
+# growth past the tolerance is a real change in the construct tree.
+APP_METRICS = [
+    "wall_seconds",
+    "startup_seconds",
+    "construct_seconds",
+    "synth_seconds",
+    "peak_rss_mb",
+]
+STACK_METRICS = ["constructs", "resources", "template_bytes"]
+
+
+def _context(app_dir: str) -> dict:
+    """Feature flags from ``cdk.json``, as the CDK CLI passes them to an app."""
+    with open(os.path.join(app_dir, "cdk.json")) as f:
+        return json.load(f).get("context", {})
+
+
+def _count_constructs(node: dict) -> int:
+    return 1 + sum(_count_constructs(child) for child in node.get("children", {}).values())
+
+
+def _stack_stats(outdir: str) -> dict:
+    with open(os.path.join(outdir, "manifest.json")) as f:
+        manifest = json.load(f)
+    with open(os.path.join(outdir, "tree.json")) as f:
+        tree = json.load(f)["tree"]
+
+    stacks = {}
+    for name, artifact in manifest["artifacts"].items():
+        if artifact["type"] != "aws:cloudformation:stack":
+            continue
+
+        template_file = os.path.join(outdir, artifact["properties"]["templateFile"])
+        with open(template_file) as f:
+            template = json.load(f)
+
+        stacks[name] = {
+            "constructs": _count_constructs(tree["children"][name]),
+            "resources": len(template.get("Resources", {})),
+            "template_bytes": os.path.getsize(template_file),
+        }
+    return stacks
+
+
+def run_app(name: str, profile_dir: str = None) -> dict:
+    app_dir = os.path.join(ROOT, name)
+    app = APPS[name]
+
+    with tempfile.TemporaryDirectory() as outdir:
+        phases_file = os.path.join(outdir, "phases.json")
+
+        env = dict(os.environ)
+        env.update(app["environment"])
+        env.update(
+            {
+                "CDK_OFFLINE": "1",
+                "CDK_OUTDIR": outdir,
+                "CDK_CONTEXT_JSON": json.dumps(_context(app_dir)),
+            }
+        )
+
+        command = [sys.executable, os.path.abspath(__file__), "--run", name, phases_file]
+        if profile_dir is not None:
+            command += ["--profile", os.path.abspath(profile_dir)]
+
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=app_dir, env=env)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+
+        # Like Popen.returncode: negative for the signal that killed it
+        if os.WIFSIGNALED(status):
+            returncode = -os.WTERMSIG(status)
+        else:
+            returncode = os.WEXITSTATUS(status)
+        if returncode != 0:
+            raise SystemExit(f"{name}: synth failed with exit code {returncode}")
+
+        with open(phases_file) as f:
+            result = json.load(f)
+
+        result["wall_seconds"] = wall
+        result["peak_rss_mb"] = usage.ru_maxrss / 1024
+        result["stacks"] = _stack_stats(outdir)
+        return result
+
+
+def _run_in_process(name: str, phases_file: str, profile_dir: str = None):
+    """Synthesizes ``app.py`` from the current directory and records phase timings."""
+    import runpy
+
+    import boto3
+
+    def _no_aws(*args, **kwargs):
+        raise RuntimeError(f"AWS call during offline synth: {args} {kwargs}")
+
+    boto3.client = _no_aws
+    boto3.session.Session.client = _no_aws
+
+    # Mirror the `pip install -e .` layout the apps are normally run with.
+    sys.path[:0] = [os.getcwd(), os.path.join(os.getcwd(), name)]
+
+    phases = {}
+    start = time.perf_counter()
+    from aws_cdk import core
+
+    phases["startup_seconds"] = time.perf_counter() - start
+
+    synth = core.App.synth
+
+    def _timed_synth(self, *args, **kwargs):
+        synth_start = time.perf_counter()
+        phases["construct_seconds"] = synth_start - start - phases["startup_seconds"]
+        assembly = synth(self, *args, **kwargs)
+        phases["synth_seconds"] = time.perf_counter() - synth_start
+        return assembly
+
+    core.App.synth = _timed_synth
+
+    if profile_dir is None:
+        runpy.run_path("app.py", run_name="__main__")
+    else:
+        import cProfile
+
+        os.makedirs(profile_dir, exist_ok=True)
+        cProfile.runctx(
+            'runpy.run_path("app.py", run_name="__main__")',
+            {"runpy": runpy},
+            {},
+            filename=os.path.join(profile_dir, f"{name}.prof"),
+        )
+
+    with open(phases_file, "w") as f:
+        json.dump(phases, f)
+
+
+def benchmark(names: list, repeat: int, profile_dir: str = None) -> dict:
+    results = {}
+    for name in names:
+        runs = [run_app(name, profile_dir) for _ in range(repeat)]
+        result = {
+            metric: statistics.median(run[metric] for run in runs)
+            for metric in APP_METRICS
+        }
+        result["stacks"] = runs[-1]["stacks"]
+        results[name] = result
+    return results
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    failures = []
+
+    def _check(label, value, expected):
+        if expected and value > expected * (1 + tolerance):
+            failures.append(f"{label}: {value:.2f} > {expected:.2f} (+{tolerance:.0%})")
+
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            failures.append(f"{name}: not in the baseline")
+            continue
+
+        for metric in APP_METRICS:
+            _check(f"{name}.{metric}", result[metric], expected.get(metric))
+
+        for stack, stats in result["stacks"].items():
+            for metric in STACK_METRICS:
+                _check(
+                    f"{name}.{stack}.{metric}",
+                    stats[metric],
+                    expected.get("stacks", {}).get(stack, {}).get(metric),
+                )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", action="append", choices=sorted(APPS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--write-baseline",
+        "--update-baseline",
+        action="store_true",
+        help="record the results in the baseline instead of comparing",
+    )
+    parser.add_argument("--profile", metavar="DIR", help="write cProfile output per app")
+    parser.add_argument("--run", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        _run_in_process(args.run[0], args.run[1], args.profile)
+        return
+
+    results = benchmark(args.app or sorted(APPS), args.repeat, args.profile)
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.write_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return
+
+    if not os.path.exists(args.baseline):
+        sys.exit(f"No baseline at {args.baseline}; record one with --write-baseline")
+
+    with open(args.baseline) as f:
+        failures = regressions(results, json.load(f), args.tolerance)
+
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Deploys the networking and infrastructure CDK apps as one dependency graph.
+
+Every stack starts as soon as the stacks it depends on are deployed, so
+independent stacks (``vpn``, ``test`` and ``infrastructure`` after
+``networking``) deploy at the same time. Outputs of upstream stacks, such as
+the ``VpcId`` and subnet outputs of ``networking``, are passed to downstream
+apps as the environment variables their ``app.py`` reads, instead of being
+copied into ``.env`` by hand. Each app is synthesized once, and all its stacks
+deploy from that cloud assembly.
+
+    python deploy/deploy.py                         # deploy everything
+    python deploy/deploy.py --dry-run               # print the plan
+    python deploy/deploy.py --skip networking vpn   # reuse deployed stacks
+    python deploy/deploy.py --only jenkins          # jenkins and its upstreams
+"""
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Environment variable -> (stack, output key) for the infrastructure app
+INFRASTRUCTURE_INPUTS = {
+    "VPC_ID": ("networking", "VpcId"),
+    "INFRASTRUCTURE_SUBNET_1": ("networking", "InfrastructureSubnet1"),
+    "INFRASTRUCTURE_SUBNET_2": ("networking", "InfrastructureSubnet2"),
+    "JENKINS_SUBNET_1": ("networking", "JenkinsSubnet1"),
+    "JENKINS_SUBNET_2": ("networking", "JenkinsSubnet2"),
+}
+
+# Stack name -> app directory, upstream stacks and inputs from their outputs.
+# Stacks of the same app are deployed with `--exclusively`, so dependencies that
+# CDK would otherwise deploy implicitly are listed here.
+STACKS = {
+    "networking": {"app": "networking", "depends_on": [], "inputs": {}},
+    "vpn": {"app": "networking", "depends_on": ["networking"], "inputs": {}},
+    "test": {"app": "networking", "depends_on": ["networking"], "inputs": {}},
+    "infrastructure": {
+        "app": "infrastructure",
+        "depends_on": ["networking"],
+        "inputs": INFRASTRUCTURE_INPUTS,
+    },
+    "mirror": {
+        "app": "infrastructure",
+        "depends_on": ["infrastructure"],
+        "inputs": INFRASTRUCTURE_INPUTS,
+        "enabled": lambda env: env.get("MIRROR_ENABLED", "false") == "true",
+    },
+    "jenkins": {
+        "app": "infrastructure",
+        "depends_on": ["infrastructure", "mirror"],
+        "inputs": INFRASTRUCTURE_INPUTS,
+    },
+}
+
+_print_lock = threading.Lock()
+_synth_lock = threading.Lock()
+
+
+def _log(stack: str, line: str):
+    with _print_lock:
+        print(f"[{stack}] {line}", flush=True)
+
+
+def app_environment(app: str) -> dict:
+    """The environment an app sees: its `.env` file, overridden by the process environment."""
+    from dotenv import dotenv_values
+
+    return {**dotenv_values(os.path.join(ROOT, app, ".env")), **os.environ}
+
+
+def plan(only: list = None) -> dict:
+    """Stack name -> upstream stacks, for the enabled stacks that are deployed."""
+    enabled = [
+        name
+        for name, stack in STACKS.items()
+        if stack.get("enabled", lambda env: True)(app_environment(stack["app"]))
+    ]
+    graph = {
+        name: [dep for dep in STACKS[name]["depends_on"] if dep in enabled]
+        for name in enabled
+    }
+
+    if only:
+        unknown = set(only) - set(graph)
+        if unknown:
+            raise SystemExit(f"Unknown or disabled stacks: {sorted(unknown)}")
+
+        selected = set()
+        pending = list(only)
+        while pending:
+            name = pending.pop()
+            if name not in selected:
+                selected.add(name)
+                pending.extend(graph[name])
+        graph = {name: deps for name, deps in graph.items() if name in selected}
+
+    return graph
+
+
+def waves(graph: dict) -> list:
+    """Groups the stacks by the earliest point they can start; fails on cycles."""
+    remaining = dict(graph)
+    done, result = set(), []
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if set(deps) <= done)
+        if not ready:
+            raise SystemExit(f"Dependency cycle between {sorted(remaining)}")
+        result.append(ready)
+        done.update(ready)
+        for name in ready:
+            del remaining[name]
+    return result
+
+
+def stack_outputs(name: str, profile: str = None) -> dict:
+    """Outputs of an already deployed stack."""
+    import boto3
+
+    session = boto3.session.Session(profile_name=profile)
+    stack = session.client("cloudformation").describe_stacks(StackName=name)["Stacks"][0]
+    return {output["OutputKey"]: output["OutputValue"] for output in stack.get("Outputs", [])}
+
+
+def stack_environment(name: str, outputs: dict, env: dict) -> dict:
+    stack_env = dict(env)
+    for variable, (upstream, key) in STACKS[name]["inputs"].items():
+        if upstream not in outputs:
+            continue
+        if key not in outputs[upstream]:
+            raise RuntimeError(f"{upstream} has no output {key}")
+        stack_env[variable] = outputs[upstream][key]
+    return stack_env
+
+
+def _run(name: str, label: str, command: list, cwd: str, env: dict):
+    _log(name, " ".join(command))
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    )
+    for line in process.stdout:
+        _log(name, line.rstrip())
+    if process.wait() != 0:
+        raise RuntimeError(f"{label} exited with {process.returncode}")
+
+
+def synth(app: str, env: dict, cdk: list, profile: str, outdir: str, assemblies: dict) -> str:
+    """Synthesizes `app` once per run and returns its cloud assembly directory.
+
+    Every stack of the app deploys from this assembly, so parallel deployments don't
+    each run the app's lookups (such as the VPN certificate import) and write
+    `cdk.context.json` at the same time.
+    """
+    with _synth_lock:
+        if app not in assemblies:
+            assembly = os.path.join(outdir, app)
+            command = cdk + ["synth", "--output", assembly]
+            if profile:
+                command += ["--profile", profile]
+            _run(app, "cdk synth", command, os.path.join(ROOT, app), env)
+            assemblies[app] = assembly
+        return assemblies[app]
+
+
+def deploy(name: str, assembly: str, env: dict, cdk: list, profile: str = None) -> dict:
+    """Runs `cdk deploy` for one stack of a synthesized assembly and returns its outputs."""
+    app_dir = os.path.join(ROOT, STACKS[name]["app"])
+
+    with tempfile.TemporaryDirectory(prefix=f"cdk.outputs.{name}.") as outdir:
+        outputs_file = os.path.join(outdir, "outputs.json")
+        command = cdk + [
+            "deploy",
+            name,
+            "--app",
+            assembly,
+            "--exclusively",
+            "--require-approval",
+            "never",
+            "--outputs-file",
+            outputs_file,
+        ]
+        if profile:
+            command += ["--profile", profile]
+
+        _run(name, "cdk deploy", command, app_dir, env)
+
+        with open(outputs_file) as f:
+            return json.load(f).get(name, {})
+
+
+def synth_and_deploy(name: str, env: dict, cdk: list, profile: str, outdir: str, assemblies: dict):
+    assembly = synth(STACKS[name]["app"], env, cdk, profile, outdir, assemblies)
+    return deploy(name, assembly, env, cdk, profile)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", help="deploy these stacks and their upstreams")
+    parser.add_argument(
+        "--skip", nargs="+", default=[], help="already deployed stacks to read outputs from"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="print the plan and exit")
+    parser.add_argument("--cdk", default="cdk", help="command that runs the CDK CLI")
+    parser.add_argument("--networking-profile", help="AWS profile for the networking app")
+    parser.add_argument(
+        "--infrastructure-profile", help="AWS profile for the infrastructure app"
+    )
+    parser.add_argument("--max-parallel", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    graph = plan(args.only)
+    profiles = {
+        "networking": args.networking_profile,
+        "infrastructure": args.infrastructure_profile,
+    }
+
+    for index, wave in enumerate(waves(graph), start=1):
+        print(f"wave {index}: {', '.join(wave)}")
+    if args.dry_run:
+        return 0
+
+    unknown = set(args.skip) - set(STACKS)
+    if unknown:
+        raise SystemExit(f"Unknown stacks: {sorted(unknown)}")
+
+    outputs = {}
+    for name in args.skip:
+        outputs[name] = stack_outputs(name, profiles[STACKS[name]["app"]])
+        _log(name, "skipped, using deployed outputs")
+
+    done = set(args.skip)
+    pending = {name: deps for name, deps in graph.items() if name not in done}
+    failed = []
+    cdk = shlex.split(args.cdk)
+
+    # Apps are synthesized into `outdir` once, on the first deployment of one of their stacks
+    assemblies = {}
+    with tempfile.TemporaryDirectory(prefix="cdk.out.deploy.") as outdir:
+        with ThreadPoolExecutor(max_workers=args.max_parallel) as executor:
+            running = {}
+            while pending or running:
+                if not failed:
+                    for name in [n for n, deps in pending.items() if set(deps) <= done]:
+                        del pending[name]
+                        future = executor.submit(
+                            synth_and_deploy,
+                            name,
+                            stack_environment(name, outputs, env),
+                            cdk,
+                            profiles[STACKS[name]["app"]],
+                            outdir,
+                            assemblies,
+                        )
+                        running[future] = name
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        outputs[name] = future.result()
+                        done.add(name)
+                        _log(name, "deployed")
+                    except Exception as error:
+                        failed.append(name)
+                        _log(name, f"failed: {error}")
+
+    if failed or pending:
+        print(f"failed: {', '.join(failed)}; not started: {', '.join(sorted(pending))}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import os
+import sys
+
+DEPLOY_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# deploy.py is a script, not a package
+sys.path.insert(0, DEPLOY_DIR)
@@ -0,0 +1,50 @@
+"""Stands in for the CDK CLI in the deploy tests.
+
+Appends each call, with the inputs the apps read, as a JSON line to
+`FAKE_CDK_LOG`, writes an empty assembly for `synth` and the outputs file for
+`deploy`. Deploying the stack named by `FAKE_CDK_FAIL` exits non-zero.
+"""
+import json
+import os
+import sys
+
+# Outputs of the deployed stacks, as CloudFormation returns them
+OUTPUTS = {
+    "networking": {
+        "VpcId": "vpc-1",
+        "InfrastructureSubnet1": "subnet-i1",
+        "InfrastructureSubnet2": "subnet-i2",
+        "JenkinsSubnet1": "subnet-j1",
+        "JenkinsSubnet2": "subnet-j2",
+    },
+}
+
+
+def log(**entry):
+    entry.update(app=os.path.basename(os.getcwd()), VPC_ID=os.environ.get("VPC_ID"))
+    with open(os.environ["FAKE_CDK_LOG"], "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def option(args: list, name: str) -> str:
+    return args[args.index(name) + 1]
+
+
+def main(args: list) -> int:
+    if args[0] == "synth":
+        assembly = option(args, "--output")
+        os.makedirs(assembly)
+        log(command="synth", assembly=assembly)
+        return 0
+
+    name = args[1]
+    log(command="deploy", stack=name, assembly=option(args, "--app"))
+    if name == os.environ.get("FAKE_CDK_FAIL"):
+        return 3
+    with open(option(args, "--outputs-file"), "w") as f:
+        json.dump({name: OUTPUTS.get(name, {})}, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
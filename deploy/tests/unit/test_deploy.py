@@ -0,0 +1,180 @@
+import json
+import os
+import sys
+
+import deploy
+import pytest
+
+FAKE_CDK = os.path.join(os.path.dirname(__file__), "fake_cdk.py")
+
+NETWORKING_OUTPUTS = {
+    "VpcId": "vpc-deployed",
+    "InfrastructureSubnet1": "subnet-i1",
+    "InfrastructureSubnet2": "subnet-i2",
+    "JenkinsSubnet1": "subnet-j1",
+    "JenkinsSubnet2": "subnet-j2",
+}
+
+
+@pytest.fixture(autouse=True)
+def apps(tmp_path, monkeypatch):
+    """App directories without `.env` files, so only the test's environment counts."""
+    root = tmp_path / "apps"
+    for app in ("networking", "infrastructure"):
+        (root / app).mkdir(parents=True)
+    monkeypatch.setattr(deploy, "ROOT", str(root))
+    monkeypatch.delenv("MIRROR_ENABLED", raising=False)
+    return root
+
+
+@pytest.fixture
+def cdk(tmp_path, monkeypatch):
+    """Runs `deploy.main` against the fake CDK CLI and returns its calls."""
+    log_file = tmp_path / "cdk.log"
+    monkeypatch.setenv("FAKE_CDK_LOG", str(log_file))
+
+    def run(*args) -> tuple:
+        returncode = deploy.main(["--cdk", f"{sys.executable} {FAKE_CDK}", *args])
+        calls = []
+        if log_file.exists():
+            calls = [json.loads(line) for line in log_file.read_text().splitlines()]
+        return returncode, calls
+
+    return run
+
+
+def deployed(calls: list) -> list:
+    return [call["stack"] for call in calls if call["command"] == "deploy"]
+
+
+def test_waves():
+    assert deploy.waves(deploy.plan()) == [
+        ["networking"],
+        ["infrastructure", "test", "vpn"],
+        ["jenkins"],
+    ]
+
+
+def test_mirror_deploys_between_infrastructure_and_jenkins(monkeypatch):
+    monkeypatch.setenv("MIRROR_ENABLED", "true")
+
+    assert deploy.waves(deploy.plan()) == [
+        ["networking"],
+        ["infrastructure", "test", "vpn"],
+        ["mirror"],
+        ["jenkins"],
+    ]
+
+
+def test_mirror_enabled_in_env_file(apps):
+    (apps / "infrastructure" / ".env").write_text("MIRROR_ENABLED=true\n")
+
+    assert deploy.plan()["jenkins"] == ["infrastructure", "mirror"]
+
+
+def test_only_adds_upstream_stacks():
+    assert deploy.plan(["jenkins"]) == {
+        "networking": [],
+        "infrastructure": ["networking"],
+        "jenkins": ["infrastructure"],
+    }
+
+
+def test_only_rejects_disabled_stacks():
+    with pytest.raises(SystemExit, match="mirror"):
+        deploy.plan(["mirror"])
+
+
+def test_cycle():
+    with pytest.raises(SystemExit, match="cycle"):
+        deploy.waves({"a": ["b"], "b": ["a"], "c": []})
+
+
+def test_outputs_become_inputs():
+    outputs = {"networking": NETWORKING_OUTPUTS}
+
+    env = deploy.stack_environment("jenkins", outputs, {"VPC_ID": "vpc-env", "OTHER": "1"})
+
+    assert env == {
+        "VPC_ID": "vpc-deployed",
+        "INFRASTRUCTURE_SUBNET_1": "subnet-i1",
+        "INFRASTRUCTURE_SUBNET_2": "subnet-i2",
+        "JENKINS_SUBNET_1": "subnet-j1",
+        "JENKINS_SUBNET_2": "subnet-j2",
+        "OTHER": "1",
+    }
+
+
+def test_inputs_fall_back_to_the_environment():
+    env = deploy.stack_environment("jenkins", {}, {"VPC_ID": "vpc-env"})
+
+    assert env == {"VPC_ID": "vpc-env"}
+
+
+def test_missing_output():
+    with pytest.raises(RuntimeError, match="networking has no output InfrastructureSubnet1"):
+        deploy.stack_environment("jenkins", {"networking": {"VpcId": "vpc-1"}}, {})
+
+
+def test_deploys_in_dependency_order(cdk):
+    returncode, calls = cdk()
+
+    assert returncode == 0
+    order = deployed(calls)
+    assert sorted(order) == ["infrastructure", "jenkins", "networking", "test", "vpn"]
+    for name, deps in deploy.plan().items():
+        assert all(order.index(dep) < order.index(name) for dep in deps)
+
+
+def test_each_app_is_synthesized_once(cdk):
+    _, calls = cdk()
+
+    synths = {call["app"]: call["assembly"] for call in calls if call["command"] == "synth"}
+    assert len(synths) == len([call for call in calls if call["command"] == "synth"])
+    assert set(synths) == {"networking", "infrastructure"}
+    for call in calls:
+        if call["command"] == "deploy":
+            assert call["assembly"] == synths[call["app"]]
+
+
+def test_infrastructure_app_gets_networking_outputs(cdk, monkeypatch):
+    monkeypatch.setenv("VPC_ID", "vpc-env")
+
+    _, calls = cdk()
+
+    for call in calls:
+        expected = "vpc-1" if call["app"] == "infrastructure" else "vpc-env"
+        assert call["VPC_ID"] == expected, call
+
+
+def test_skipped_stack_outputs(cdk, monkeypatch):
+    # Stands in for the CloudFormation call
+    monkeypatch.setattr(deploy, "stack_outputs", lambda name, profile: NETWORKING_OUTPUTS)
+
+    returncode, calls = cdk("--only", "infrastructure", "--skip", "networking")
+
+    assert returncode == 0
+    assert deployed(calls) == ["infrastructure"]
+    assert {call["VPC_ID"] for call in calls} == {"vpc-deployed"}
+
+
+def test_failure_stops_downstream_stacks(cdk, monkeypatch):
+    monkeypatch.setenv("FAKE_CDK_FAIL", "infrastructure")
+
+    returncode, calls = cdk()
+
+    assert returncode == 1
+    assert "jenkins" not in deployed(calls)
+    assert "infrastructure" in deployed(calls)
+
+
+def test_dry_run(cdk, capsys):
+    returncode, calls = cdk("--dry-run")
+
+    assert returncode == 0
+    assert calls == []
+    assert capsys.readouterr().out.splitlines() == [
+        "wave 1: networking",
+        "wave 2: infrastructure, test, vpn",
+        "wave 3: jenkins",
+    ]
@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
+import json
 import os
 
 from aws_cdk import core as cdk
 
 from infrastructure.infrastructure_stack import InfrastructureStack
 from infrastructure.jenkins_stack import JenkinsStack
+from infrastructure.mirror_stack import MirrorStack
+from infrastructure import offline
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = cdk.App()
+app = cdk.App(context=offline.load_snapshot() if offline.is_offline() else None)
 infrastucture = InfrastructureStack(
     app,
     "infrastructure",
@@ -37,8 +40,72 @@ jenkins_props = {
     "vpn_client_cidr": os.getenv("VPN_CLIENT_CIDR"),
     "admin_password": os.getenv("ADMIN_PASSWORD"),
     "controller_image": os.getenv("CONTROLLER_IMAGE"),
+    "agent_pool_min_idle": int(os.getenv("AGENT_POOL_MIN_IDLE", "0")),
+    "agent_pool_max_agents": int(os.getenv("AGENT_POOL_MAX_AGENTS", "50")),
+    "agent_retention_minutes": int(os.getenv("AGENT_RETENTION_MINUTES", "10")),
+    "agent_size_classes": json.loads(os.getenv("AGENT_SIZE_CLASSES", "null")),
+    "agent_spot_weight": int(os.getenv("AGENT_SPOT_WEIGHT", "4")),
+    "agent_on_demand_weight": int(os.getenv("AGENT_ON_DEMAND_WEIGHT", "1")),
+    "agent_on_demand_base": int(os.getenv("AGENT_ON_DEMAND_BASE", "0")),
+    "efs_profile": os.getenv("EFS_PROFILE", "bursting"),
+    "efs_provisioned_mibps": int(os.getenv("EFS_PROVISIONED_MIBPS", "64")),
+    "efs_performance_mode": os.getenv("EFS_PERFORMANCE_MODE", "general_purpose"),
+    "efs_ia_after_days": int(os.getenv("EFS_IA_AFTER_DAYS", "0")),
+    "ephemeral_workspaces": os.getenv("EPHEMERAL_WORKSPACES", "false") == "true",
+    "controller_ephemeral_storage_gib": int(
+        os.getenv("CONTROLLER_EPHEMERAL_STORAGE_GIB", "0")
+    ),
+    "controller_profile": os.getenv("CONTROLLER_PROFILE", "small"),
+    "controller_plugin_profile": os.getenv("CONTROLLER_PLUGIN_PROFILE", "full"),
+    "controller_grace_period_seconds": int(
+        os.getenv("CONTROLLER_GRACE_PERIOD_SECONDS", "300")
+    ),
+    "alarm_topic_arn": os.getenv("ALARM_TOPIC_ARN"),
+    "build_cache_expiration_days": int(os.getenv("BUILD_CACHE_EXPIRATION_DAYS", "14")),
+    "casc_poll_seconds": int(os.getenv("CASC_POLL_SECONDS", "30")),
+    "queue_wait_alarm_seconds": int(os.getenv("QUEUE_WAIT_ALARM_SECONDS", "300")),
+    "agent_log_mode": os.getenv("AGENT_LOG_MODE", "non-blocking"),
+    "agent_log_buffer_size": os.getenv("AGENT_LOG_BUFFER_SIZE", "25m"),
+    "agent_log_retention_days": int(os.getenv("AGENT_LOG_RETENTION_DAYS", "7")),
+    "agent_log_archive": os.getenv("AGENT_LOG_ARCHIVE", "false") == "true",
+    "agent_log_archive_expiration_days": int(
+        os.getenv("AGENT_LOG_ARCHIVE_EXPIRATION_DAYS", "365")
+    ),
+    "teams": json.loads(os.getenv("JENKINS_TEAMS", "[]")),
+    "controller_home_path": os.getenv("CONTROLLER_HOME_PATH"),
+    "alb_idle_timeout_seconds": int(os.getenv("ALB_IDLE_TIMEOUT_SECONDS", "300")),
+    "alb_http2_enabled": os.getenv("ALB_HTTP2_ENABLED", "true") == "true",
+    "alb_deregistration_delay_seconds": int(
+        os.getenv("ALB_DEREGISTRATION_DELAY_SECONDS", "30")
+    ),
+    "alb_health_check_path": os.getenv("ALB_HEALTH_CHECK_PATH", "/whoAmI/api/json"),
+    "alb_health_check_interval_seconds": int(
+        os.getenv("ALB_HEALTH_CHECK_INTERVAL_SECONDS", "15")
+    ),
+    "alb_health_check_timeout_seconds": int(
+        os.getenv("ALB_HEALTH_CHECK_TIMEOUT_SECONDS", "5")
+    ),
+    "alb_healthy_threshold": int(os.getenv("ALB_HEALTHY_THRESHOLD", "2")),
+    "alb_unhealthy_threshold": int(os.getenv("ALB_UNHEALTHY_THRESHOLD", "3")),
+    "alb_stickiness_minutes": int(os.getenv("ALB_STICKINESS_MINUTES", "0")),
+    "agent_endpoint": os.getenv("AGENT_ENDPOINT", "nlb"),
 }
 
+if os.getenv("MIRROR_ENABLED", "false") == "true":
+    mirror = MirrorStack(
+        app,
+        "mirror",
+        infrastucture.cluster,
+        {
+            **jenkins_props,
+            "docker_hub_credential_arn": os.getenv("DOCKER_HUB_CREDENTIAL_ARN"),
+        },
+        env=cdk.Environment(
+            account=os.getenv("AWS_ACCOUNT"), region=os.getenv("AWS_REGION")
+        ),
+    )
+    jenkins_props["agent_environment"] = mirror.agent_environment
+
 JenkinsStack(
     app,
     "jenkins",
@@ -49,4 +116,7 @@ JenkinsStack(
     ),
 )
 
-app.synth()
+assembly = app.synth()
+
+if offline.is_offline():
+    offline.assert_resolved(assembly)
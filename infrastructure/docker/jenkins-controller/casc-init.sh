@@ -0,0 +1,13 @@
+# Sourced by jenkins.sh before Jenkins starts
+
+# Fails the startup when the configuration can't be rendered
+/casc_watcher.py --once
+
+# The CasC plugin reads the reload token from CASC_RELOAD_TOKEN. It stays out of
+# JAVA_OPTS, where every process could read it from the java command line.
+export CASC_RELOAD_TOKEN
+
+# Picks up later changes to the settings parameter and reloads them into Jenkins
+if [ -n "$casc_parameter" ]; then
+    /casc_watcher.py &
+fi
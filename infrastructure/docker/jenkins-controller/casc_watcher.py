@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+from os import environ, getenv
+import argparse
+import json
+import sys
+import time
+
+import boto3
+
+import modify_casc
+
+
+def log(message):
+    print('casc_watcher: {}'.format(message), flush=True)
+
+
+def fetch_settings(client, name):
+    """Returns the version and the decoded value of the CasC settings parameter."""
+    parameter = client.get_parameter(Name=name)['Parameter']
+    try:
+        return parameter['Version'], json.loads(parameter['Value'])
+    except ValueError as error:
+        raise modify_casc.ConfigurationError('{} is not valid JSON: {}'.format(name, error))
+
+
+def settings_environment(settings):
+    """The task environment with `settings` layered over it.
+
+    Values that aren't strings are passed on JSON encoded, so `agent_templates` and
+    `agent_environment` can be stored as plain JSON.
+    """
+    values = {k: v if isinstance(v, str) else json.dumps(v) for k, v in settings.items()}
+    return {**environ, **values}
+
+
+def current_environment():
+    """`settings_environment` for the current version of the `casc_parameter` parameter."""
+    name = getenv('casc_parameter')
+    client = boto3.client('ssm', region_name=getenv('aws_region'))
+    try:
+        _, settings = fetch_settings(client, name)
+    except modify_casc.ConfigurationError:
+        raise
+    except Exception as error:
+        raise modify_casc.ConfigurationError('Unable to read {}: {}'.format(name, error))
+    return settings_environment(settings)
+
+
+def apply_settings(settings):
+    """Renders and validates the configuration with `settings` layered over the environment.
+
+    Returns True when `/jenkins.yaml` changed.
+    """
+    content = modify_casc.render(settings_environment(settings))
+    modify_casc.validate(content)
+    return modify_casc.write_if_changed(content)
+
+
+def watch(client, name, version, interval):
+    reload_pending = False
+    while True:
+        time.sleep(interval)
+        try:
+            latest, settings = fetch_settings(client, name)
+            if latest != version:
+                # Recorded first so that a bad version is reported once, not on every poll
+                version = latest
+                if apply_settings(settings):
+                    log('applied version {}'.format(version))
+                    reload_pending = True
+            if reload_pending:
+                modify_casc.reload_configuration()
+                reload_pending = False
+                log('reloaded configuration')
+        except Exception as error:
+            # Keep the last good configuration and try again on the next poll
+            log('error: {}'.format(error))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Keep the Jenkins CasC configuration in sync with SSM')
+    parser.add_argument('--once', action='store_true',
+                        help='render the current settings and exit')
+    args = parser.parse_args(argv)
+
+    name = getenv('casc_parameter')
+    if not name:
+        # Settings come from the task environment only
+        return modify_casc.main([]) if args.once else 0
+
+    client = boto3.client('ssm', region_name=getenv('aws_region'))
+    try:
+        version, settings = fetch_settings(client, name)
+        apply_settings(settings)
+    except Exception as error:
+        log('error: {}'.format(error))
+        return 1
+
+    log('rendered version {} of {}'.format(version, name))
+    if not args.once:
+        watch(client, name, version, int(getenv('casc_poll_seconds', '30')))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
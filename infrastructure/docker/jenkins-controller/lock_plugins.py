@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Resolves plugins.txt into plugins.lock, which pins every plugin and dependency.
+
+Builds the controller image from plugins.txt, copies the installed plugins out
+of it and reads their versions from the plugin manifests. Commit the result;
+the Dockerfile installs the full plugin profile from plugins.lock and fails
+without it.
+
+    python lock_plugins.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IMAGE = "jenkins-controller:lock"
+PLUGIN_DIR = "/usr/share/jenkins/ref/plugins"
+HEADER = """\
+# Generated by lock_plugins.py from plugins.txt. Dependencies not listed here
+# resolve to the minimum versions the listed plugins declare.
+"""
+
+
+def manifest(path: str) -> dict:
+    with zipfile.ZipFile(path) as plugin:
+        lines = plugin.read("META-INF/MANIFEST.MF").decode().replace("\r\n ", "").splitlines()
+    return dict(line.split(": ", 1) for line in lines if ": " in line)
+
+
+def main():
+    docker = os.getenv("CDK_DOCKER", "docker")
+    subprocess.run(
+        [docker, "build", "--build-arg", "PLUGIN_FILE=plugins.txt", "-t", IMAGE, HERE],
+        check=True,
+    )
+    container = subprocess.run(
+        [docker, "create", IMAGE], check=True, stdout=subprocess.PIPE, universal_newlines=True
+    ).stdout.strip()
+
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            subprocess.run([docker, "cp", f"{container}:{PLUGIN_DIR}", workdir], check=True)
+            plugins_dir = os.path.join(workdir, "plugins")
+            plugins = []
+            for name in sorted(os.listdir(plugins_dir)):
+                if name.endswith((".jpi", ".hpi")):
+                    attributes = manifest(os.path.join(plugins_dir, name))
+                    plugins.append(f"{attributes['Short-Name']}:{attributes['Plugin-Version']}")
+    finally:
+        subprocess.run([docker, "rm", container], check=True, stdout=subprocess.DEVNULL)
+
+    with open(os.path.join(HERE, "plugins.lock"), "w") as f:
+        f.write(HEADER + "\n".join(plugins) + "\n")
+    print(f"plugins.lock: {len(plugins)} plugins")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
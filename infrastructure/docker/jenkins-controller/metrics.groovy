@@ -0,0 +1,116 @@
+import jenkins.model.Jenkins
+import jenkins.util.Timer
+import hudson.ExtensionList
+import hudson.model.Label
+import hudson.model.Node
+import hudson.model.Queue
+import hudson.model.queue.QueueListener
+import hudson.slaves.Cloud
+import hudson.slaves.CloudProvisioningListener
+import hudson.slaves.NodeProvisioner
+import java.util.concurrent.ConcurrentHashMap
+import java.util.concurrent.ConcurrentLinkedQueue
+import java.util.concurrent.TimeUnit
+import java.util.concurrent.atomic.AtomicInteger
+import com.amazonaws.services.cloudwatch.AmazonCloudWatchClientBuilder
+import com.amazonaws.services.cloudwatch.model.Dimension
+import com.amazonaws.services.cloudwatch.model.MetricDatum
+import com.amazonaws.services.cloudwatch.model.PutMetricDataRequest
+import com.amazonaws.services.cloudwatch.model.StandardUnit
+
+// Publishes queue, provisioning and executor metrics to CloudWatch once a minute.
+// Wait and launch times are sent as raw values so that CloudWatch can compute percentiles.
+def namespace = System.getenv("metrics_namespace")
+def controller = System.getenv("controller_name") ?: "jenkins"
+
+class QueueWaitListener extends QueueListener {
+  ConcurrentLinkedQueue<Double> waits = new ConcurrentLinkedQueue<>()
+
+  @Override
+  void onLeft(Queue.LeftItem item) {
+    if (!item.isCancelled()) {
+      waits.add((System.currentTimeMillis() - item.inQueueSince) / 1000.0d)
+    }
+  }
+}
+
+class ProvisioningListener extends CloudProvisioningListener {
+  ConcurrentHashMap<NodeProvisioner.PlannedNode, Long> started = new ConcurrentHashMap<>()
+  ConcurrentLinkedQueue<Double> launches = new ConcurrentLinkedQueue<>()
+  AtomicInteger failures = new AtomicInteger(0)
+
+  @Override
+  void onStarted(Cloud cloud, Label label, Collection<NodeProvisioner.PlannedNode> plannedNodes) {
+    def now = System.currentTimeMillis()
+    plannedNodes.each { started.put(it, now) }
+  }
+
+  @Override
+  void onComplete(NodeProvisioner.PlannedNode plannedNode, Node node) {
+    def since = started.remove(plannedNode)
+    if (since != null) {
+      launches.add((System.currentTimeMillis() - since) / 1000.0d)
+    }
+  }
+
+  @Override
+  void onFailure(NodeProvisioner.PlannedNode plannedNode, Throwable t) {
+    started.remove(plannedNode)
+    failures.incrementAndGet()
+  }
+}
+
+def drain(queue) {
+  def values = []
+  def value
+  while ((value = queue.poll()) != null) {
+    values << value
+  }
+  values
+}
+
+if (namespace) {
+  def queueListener = new QueueWaitListener()
+  def provisioningListener = new ProvisioningListener()
+  ExtensionList.lookup(QueueListener).add(queueListener)
+  ExtensionList.lookup(CloudProvisioningListener).add(provisioningListener)
+
+  def cloudWatch = AmazonCloudWatchClientBuilder.defaultClient()
+  def dimension = new Dimension().withName("Controller").withValue(controller)
+
+  Timer.get().scheduleWithFixedDelay({
+    try {
+      def jenkins = Jenkins.get()
+      def now = new Date()
+      def datum = { String name, StandardUnit unit ->
+        new MetricDatum().withMetricName(name).withUnit(unit).withTimestamp(now).withDimensions(dimension)
+      }
+
+      def computers = jenkins.computers.findAll { it.node != jenkins }
+      def busy = computers.sum(0) { it.countBusy() }
+      def total = computers.sum(0) { it.online ? it.countExecutors() : 0 }
+
+      def data = [
+        datum("QueueLength", StandardUnit.Count).withValue(jenkins.queue.items.length as double),
+        datum("BuildableItems", StandardUnit.Count).withValue(jenkins.queue.buildableItems.size() as double),
+        datum("BusyExecutors", StandardUnit.Count).withValue(busy as double),
+        datum("TotalExecutors", StandardUnit.Count).withValue(total as double),
+        datum("FailedProvisions", StandardUnit.Count).withValue(provisioningListener.failures.getAndSet(0) as double),
+      ]
+
+      // PutMetricData accepts at most 150 values per datum
+      drain(queueListener.waits).collate(150).each {
+        data << datum("QueueWaitTime", StandardUnit.Seconds).withValues(it)
+      }
+      drain(provisioningListener.launches).collate(150).each {
+        data << datum("AgentLaunchTime", StandardUnit.Seconds).withValues(it)
+      }
+
+      data.collate(20).each {
+        cloudWatch.putMetricData(new PutMetricDataRequest().withNamespace(namespace).withMetricData(it))
+      }
+    } catch (Exception e) {
+      println "metrics: ${e}"
+    }
+  } as Runnable, 1, 1, TimeUnit.MINUTES)
+}
@@ -1,30 +1,227 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 
-from jinja2 import Environment, FileSystemLoader
-from os import getenv
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+from os import environ, getenv, path
+from urllib import request
+import argparse
+import hashlib
+import json
+import sys
+import yaml
 
+TEMPLATE_FILE = '/jenkins.j2'
+CONFIG_FILE = '/jenkins.yaml'
 
-def main():
-    # This value comes as a build env var: `SSM_CONFIG_PARAM_NAME`
-    _env = Environment(loader=FileSystemLoader('/'))
-    _template = _env.get_template("/jenkins.j2")
-    _config_file = open("/jenkins.yaml", "w")
+# Template variable -> environment variable; rendering fails when any is unset or empty
+REQUIRED_VARIABLES = {
+    'ECS_CLUSTER_ARN': 'cluster_arn',
+    'AWS_REGION': 'aws_region',
+    'JENKINS_URL': 'jenkins_url',
+    'SUBNET_IDS': 'subnet_ids',
+    'SECURITY_GROUP_IDS': 'security_group_ids',
+    'EXECUTION_ROLE_ARN': 'execution_role_arn',
+    'TASK_ROLE_ARN': 'task_role_arn',
+    'AGENT_IMAGE': 'agent_image',
+    'LOG_GROUP': 'worker_log_group',
+    'LOG_STREAM_PREFIX': 'worker_log_stream_prefix',
+}
 
-    _config_file.write((_template.render(
-        ECS_CLUSTER_ARN=getenv('cluster_arn'),
-        AWS_REGION=getenv('aws_region'),
-        JENKINS_URL=getenv('jenkins_url'),
-        ADMIN_PASSWORD=getenv('admin_password'),
-        SUBNET_IDS=getenv('subnet_ids'),
-        SECURITY_GROUP_IDS=getenv('security_group_ids'),
-        EXECUTION_ROLE_ARN=getenv('execution_role_arn'),
-        TASK_ROLE_ARN=getenv('task_role_arn'),
-        LOG_GROUP=getenv('worker_log_group'),
-        LOG_STREAM_PREFIX=getenv('worker_log_stream_prefix')
-    )))
+# Template variable -> (environment variable, default)
+OPTIONAL_VARIABLES = {
+    'ADMIN_PASSWORD': ('admin_password', ''),
+    'CLOUD_NAME': ('cloud_name', 'fargate-agents'),
+    'TUNNEL': ('agent_tunnel', ''),
+    'RETENTION_TIMEOUT': ('agent_retention_minutes', '10'),
+    'MAX_AGENTS': ('agent_pool_max_agents', '50'),
+    'LOG_MODE': ('agent_log_mode', 'non-blocking'),
+    'LOG_BUFFER_SIZE': ('agent_log_buffer_size', '25m'),
+}
 
-    _config_file.close()
+# Template variable -> (environment variable, default) for JSON encoded values
+JSON_VARIABLES = {
+    'AGENT_ENVIRONMENT': ('agent_environment', '{}'),
+    'AGENT_TEMPLATES': ('agent_templates', 'null'),
+}
+
+# Used when `agent_templates` is not set; matches the original single template
+DEFAULT_AGENT_TEMPLATES = [
+    {'name': 'nodes', 'label': 'fargate-agents', 'cpu': 1024, 'memory': 2048, 'capacity_providers': []}
+]
+
+# Shape of the rendered configuration: dicts list required keys, a one element list
+# describes every item, and types are the expected scalar types.
+SCHEMA = {
+    'jenkins': {
+        'numExecutors': int,
+        'slaveAgentPort': int,
+        'clouds': [{
+            'ecs': {
+                'cluster': str,
+                'regionName': str,
+                'name': str,
+                'jenkinsUrl': str,
+                'retentionTimeout': int,
+                'maxAgents': int,
+                'templates': [{
+                    'label': str,
+                    'templateName': str,
+                    'image': str,
+                    'cpu': int,
+                    'memoryReservation': int,
+                    'subnets': str,
+                    'securityGroups': str,
+                    'executionRole': str,
+                    'taskrole': str,
+                }],
+            },
+        }],
+    },
+    'aws': {'cloudWatchLogs': {'logGroupName': str}},
+}
+
+
+class ConfigurationError(Exception):
+    pass
+
+
+def variables(environ):
+    """Collects the template variables from `environ`, failing on missing required ones."""
+    missing = [name for name in REQUIRED_VARIABLES.values() if not environ.get(name)]
+    if missing:
+        raise ConfigurationError('Missing environment variables: {}'.format(', '.join(sorted(missing))))
+
+    result = {key: environ[name] for key, name in REQUIRED_VARIABLES.items()}
+    for key, (name, default) in OPTIONAL_VARIABLES.items():
+        result[key] = environ.get(name) or default
+    for key, (name, default) in JSON_VARIABLES.items():
+        try:
+            result[key] = json.loads(environ.get(name) or default)
+        except ValueError as error:
+            raise ConfigurationError('{} is not valid JSON: {}'.format(name, error))
+
+    result['AGENT_TEMPLATES'] = result['AGENT_TEMPLATES'] or DEFAULT_AGENT_TEMPLATES
+    return result
+
+
+def render(environ, template_file=TEMPLATE_FILE):
+    _env = Environment(
+        loader=FileSystemLoader(path.dirname(template_file)),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        undefined=StrictUndefined,
+    )
+    _template = _env.get_template(path.basename(template_file))
+    return _template.render(**variables(environ))
+
+
+def validate(content, schema=SCHEMA):
+    """Parses the rendered YAML and checks it against `schema`."""
+    try:
+        config = yaml.safe_load(content)
+    except yaml.YAMLError as error:
+        raise ConfigurationError('Rendered configuration is not valid YAML: {}'.format(error))
+
+    errors = []
+
+    def _check(value, expected, location):
+        if isinstance(expected, dict):
+            if not isinstance(value, dict):
+                errors.append('{}: expected a mapping'.format(location))
+                return
+            for key, child in expected.items():
+                if key not in value:
+                    errors.append('{}.{}: missing'.format(location, key))
+                else:
+                    _check(value[key], child, '{}.{}'.format(location, key))
+        elif isinstance(expected, list):
+            if not isinstance(value, list) or not value:
+                errors.append('{}: expected a non-empty list'.format(location))
+                return
+            for index, item in enumerate(value):
+                _check(item, expected[0], '{}[{}]'.format(location, index))
+        elif not isinstance(value, expected) or value in ('', None):
+            errors.append('{}: expected a non-empty {}'.format(location, expected.__name__))
+
+    _check(config, schema, '$')
+    if not errors:
+        errors += _launch_errors(config)
+    if errors:
+        raise ConfigurationError('Invalid configuration:\n  ' + '\n  '.join(errors))
+    return config
+
+
+def _launch_errors(config):
+    """RunTask takes either a launch type or a capacity provider strategy, never both."""
+    errors = []
+    clouds = config.get('jenkins', {}).get('clouds', [])
+    for c, cloud in enumerate(clouds):
+        for t, template in enumerate(cloud.get('ecs', {}).get('templates', [])):
+            if ('launchType' in template) == ('capacityProviderStrategies' in template):
+                errors.append('$.jenkins.clouds[{}].ecs.templates[{}]: expected either launchType '
+                              'or capacityProviderStrategies'.format(c, t))
+    return errors
+
+
+def write_if_changed(content, config_file=CONFIG_FILE):
+    """Writes `content` unless the file already holds the same bytes; returns True when written."""
+    digest = hashlib.sha256(content.encode()).hexdigest()
+    if path.exists(config_file):
+        with open(config_file, 'rb') as f:
+            if hashlib.sha256(f.read()).hexdigest() == digest:
+                return False
+
+    with open(config_file, 'w') as f:
+        f.write(content)
+    return True
+
+
+def reload_configuration(jenkins_url=None, token=None):
+    """Asks the running controller to re-apply `/jenkins.yaml`.
+
+    Controllers served under a path (`--prefix`) get it in `JENKINS_PREFIX`.
+    """
+    jenkins_url = jenkins_url or getenv(
+        'JENKINS_LOCAL_URL', 'http://localhost:8080' + getenv('JENKINS_PREFIX', '')
+    )
+    token = token or getenv('CASC_RELOAD_TOKEN')
+    if not token:
+        raise ConfigurationError('CASC_RELOAD_TOKEN is required to reload the configuration')
+
+    _request = request.Request(
+        '{}/reload-configuration-as-code/?casc-reload-token={}'.format(jenkins_url.rstrip('/'), token),
+        method='POST',
+    )
+    with request.urlopen(_request, timeout=30) as response:
+        return response.status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the Jenkins CasC configuration')
+    parser.add_argument('--reload', action='store_true',
+                        help='reload the configuration in the running controller when it changed')
+    args = parser.parse_args(argv)
+
+    try:
+        environment = environ
+        if getenv('casc_parameter'):
+            # Render the same settings as casc_watcher, which are not in the task environment
+            import casc_watcher
+            environment = casc_watcher.current_environment()
+        content = render(environment)
+        validate(content)
+    except ConfigurationError as error:
+        print('modify_casc: {}'.format(error), file=sys.stderr)
+        return 1
+
+    if not write_if_changed(content):
+        print('modify_casc: {} is up to date'.format(CONFIG_FILE))
+        return 0
+
+    print('modify_casc: wrote {}'.format(CONFIG_FILE))
+    if args.reload:
+        reload_configuration()
+    return 0
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import jenkins.model.Jenkins
+import jenkins.util.Timer
+import hudson.model.Computer
+import java.util.concurrent.TimeUnit
+import java.util.concurrent.atomic.AtomicInteger
+
+// Keeps `agent_pool_min_idle` idle agents online for the ECS cloud so that builds don't
+// wait for a cold Fargate task. Agents above the minimum are removed by the cloud's
+// retentionTimeout once they have been idle long enough.
+def minIdle = (System.getenv("agent_pool_min_idle") ?: "0") as int
+def labelName = System.getenv("agent_pool_label") ?: "fargate-agents"
+// Agents launched here are not tracked by the NodeProvisioner until they are added
+def launching = new AtomicInteger(0)
+
+if (minIdle > 0) {
+  Timer.get().scheduleWithFixedDelay({
+    try {
+      def jenkins = Jenkins.get()
+      def label = jenkins.getLabel(labelName)
+      def pending = label.nodeProvisioner.pendingLaunches.sum(0) { it.numExecutors }
+      def deficit = minIdle - label.idleExecutors - pending - launching.get()
+
+      def cloud = jenkins.clouds.find { it.canProvision(label) }
+      if (deficit <= 0 || cloud == null) {
+        return
+      }
+
+      cloud.provision(label, deficit).each { planned ->
+        launching.addAndGet(planned.numExecutors)
+        Computer.threadPoolForRemoting.submit {
+          try {
+            // The ECS cloud registers the agent itself once its task is running
+            planned.future.get()
+          } finally {
+            launching.addAndGet(-planned.numExecutors)
+          }
+        }
+      }
+    } catch (Exception e) {
+      println "warm-pool: ${e}"
+    }
+  } as Runnable, 1, 1, TimeUnit.MINUTES)
+}
@@ -0,0 +1,46 @@
+#!/bin/sh
+# Runs next to Nexus in the mirror task. Waits for Nexus, sets the admin
+# password from NEXUS_ADMIN_PASSWORD, enables anonymous reads and creates the
+# proxy repositories the agents are pointed at. Every step is idempotent, so the
+# script runs on each task start.
+set -eu
+
+nexus=http://localhost:8081/service/rest
+
+until curl -sf "$nexus/v1/status/writable" >/dev/null; do
+    sleep 5
+done
+
+# A fresh Nexus started with NEXUS_SECURITY_RANDOMPASSWORD=false uses admin123
+if ! curl -sf -u "admin:$NEXUS_ADMIN_PASSWORD" "$nexus/v1/repositories" >/dev/null; then
+    curl -sf -u admin:admin123 -X PUT -H "Content-Type: text/plain" \
+        --data "$NEXUS_ADMIN_PASSWORD" "$nexus/v1/security/users/admin/change-password"
+fi
+
+api() {
+    curl -sf -u "admin:$NEXUS_ADMIN_PASSWORD" -H "Content-Type: application/json" "$@"
+}
+
+api -X PUT "$nexus/v1/security/anonymous" \
+    --data '{"enabled": true, "userId": "anonymous", "realmName": "NexusAuthorizingRealm"}' >/dev/null
+
+repositories=$(api "$nexus/v1/repositories")
+
+# proxy <format> <name> <remote url>
+proxy() {
+    if echo "$repositories" | grep -q "\"name\" *: *\"$2\""; then
+        return
+    fi
+    api -X POST "$nexus/v1/repositories/$1/proxy" --data "{
+        \"name\": \"$2\",
+        \"online\": true,
+        \"storage\": {\"blobStoreName\": \"default\", \"strictContentTypeValidation\": true},
+        \"proxy\": {\"remoteUrl\": \"$3\", \"contentMaxAge\": 1440, \"metadataMaxAge\": 1440},
+        \"negativeCache\": {\"enabled\": true, \"timeToLive\": 1440},
+        \"httpClient\": {\"blocked\": false, \"autoBlock\": true}
+    }"
+    echo "created $2"
+}
+
+proxy npm npm-proxy https://registry.npmjs.org
+proxy pypi pypi-proxy https://pypi.org
@@ -0,0 +1,62 @@
+import json
+
+# Memory (MiB) that Fargate accepts for each task CPU size
+FARGATE_MEMORY = {
+    256: [512, 1024, 2048],
+    512: list(range(1024, 4097, 1024)),
+    1024: list(range(2048, 8193, 1024)),
+    2048: list(range(4096, 16385, 1024)),
+    4096: list(range(8192, 30721, 1024)),
+}
+
+# `medium` keeps the `fargate-agents` label so existing jobs keep their agents
+DEFAULT_AGENT_SIZE_CLASSES = [
+    {"name": "small", "cpu": 512, "memory": 1024},
+    {"name": "medium", "cpu": 1024, "memory": 2048, "labels": ["fargate-agents"]},
+    {"name": "large", "cpu": 4096, "memory": 8192},
+    {"name": "medium-spot", "cpu": 1024, "memory": 2048, "spot": True},
+]
+
+
+def capacity_provider_strategy(
+    spot_weight: int = 4, on_demand_weight: int = 1, on_demand_base: int = 0
+) -> list:
+    """Spot-first strategy that still places part of the tasks on on-demand Fargate."""
+    strategy = [{"provider": "FARGATE_SPOT", "weight": spot_weight, "base": 0}]
+    if on_demand_weight or on_demand_base:
+        strategy.append(
+            {"provider": "FARGATE", "weight": on_demand_weight, "base": on_demand_base}
+        )
+    return strategy
+
+
+def agent_templates(size_classes: list, spot_strategy: list = None) -> str:
+    """Validates agent size classes and serializes them for `modify_casc.py`.
+
+    Spot size classes run with `spot_strategy`, the others on on-demand Fargate.
+    """
+    spot_strategy = spot_strategy or capacity_provider_strategy()
+
+    templates = []
+    for size_class in size_classes:
+        name, cpu, memory = size_class["name"], size_class["cpu"], size_class["memory"]
+        if memory not in FARGATE_MEMORY.get(cpu, []):
+            raise ValueError(
+                f"Agent size class '{name}': {cpu} CPU units with {memory} MiB is not a valid Fargate size"
+            )
+
+        templates.append(
+            {
+                "name": name,
+                "label": " ".join([name] + size_class.get("labels", [])),
+                "cpu": cpu,
+                "memory": memory,
+                "capacity_providers": spot_strategy if size_class.get("spot") else [],
+            }
+        )
+
+    names = [template["name"] for template in templates]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Agent size class names must be unique: {names}")
+
+    return json.dumps(templates)
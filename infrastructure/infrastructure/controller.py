@@ -0,0 +1,98 @@
+import re
+
+# Task size of the Jenkins controller; the JVM heap follows the container memory
+CONTROLLER_PROFILES = {
+    "small": {"cpu": 1024, "memory": 2048},
+    "medium": {"cpu": 2048, "memory": 4096},
+    "large": {"cpu": 4096, "memory": 8192},
+    "xlarge": {"cpu": 4096, "memory": 16384},
+}
+
+
+def controller_profile(name: str) -> dict:
+    if name not in CONTROLLER_PROFILES:
+        raise ValueError(
+            f"controller_profile must be one of {list(CONTROLLER_PROFILES)}, got '{name}'"
+        )
+    return CONTROLLER_PROFILES[name]
+
+
+# Plugin file the controller image is built from. "minimal" drops Blue Ocean and
+# its UI dependency tree, which dominates plugin loading at startup.
+PLUGIN_PROFILES = {
+    "full": "plugins.lock",
+    "minimal": "plugins-minimal.txt",
+}
+
+
+def plugin_file(profile: str) -> str:
+    if profile not in PLUGIN_PROFILES:
+        raise ValueError(
+            f"controller_plugin_profile must be one of {list(PLUGIN_PROFILES)}, got '{profile}'"
+        )
+    return PLUGIN_PROFILES[profile]
+
+
+def teams(definitions: list) -> list:
+    """Validates the team controller definitions.
+
+    Each team is `{"name": ..., "host": ..., "profile": ...}`; without a `host` the
+    team is served under `/<name>/` on the shared load balancer.
+    """
+    definitions = definitions or []
+    names = [team.get("name", "") for team in definitions]
+    for name in names:
+        if not re.fullmatch(r"[a-z][a-z0-9-]{0,30}", name):
+            raise ValueError(
+                f"Team name '{name}' must be lowercase letters, digits and hyphens"
+            )
+    if len(set(names)) != len(names):
+        raise ValueError(f"Team names must be unique: {names}")
+    for team in definitions:
+        if "profile" in team:
+            controller_profile(team["profile"])
+    return definitions
+
+
+def controller_home_path(props) -> str:
+    """EFS path of the default controller's `JENKINS_HOME`.
+
+    Without team controllers the default home stays at the file system root.
+    Team homes live under `/teams/`, so with teams the default home moves to
+    `/default` and must not contain them.
+    """
+    path = props.get("controller_home_path") or ("/default" if props.get("teams") else "/")
+    if not path.startswith("/") or (path.rstrip("/") in ("", "/teams") and props.get("teams")):
+        raise ValueError(
+            "controller_home_path must be an absolute path, and not `/` or `/teams` "
+            f"with team controllers, got '{path}'"
+        )
+    return path
+
+
+def controller_java_opts() -> list:
+    """JVM flags for the controller image (Java 8).
+
+    The heap is sized as a share of the container memory so it tracks the
+    profile. At 60% a fully grown heap plus metaspace, code cache, thread stacks
+    and the CasC tooling stays below the 85% memory alarm on `small`. The
+    heap is not pre-touched: committing it page by page at boot would delay
+    the first healthy response by seconds on larger profiles.
+    """
+    return [
+        "-XX:+UseG1GC",
+        "-XX:InitialRAMPercentage=50.0",
+        "-XX:MaxRAMPercentage=60.0",
+        "-XX:+ParallelRefProcEnabled",
+        "-XX:+UseStringDeduplication",
+        "-XX:+DisableExplicitGC",
+        "-XX:+HeapDumpOnOutOfMemoryError",
+        "-XX:HeapDumpPath=/var/jenkins_home",
+        "-Xloggc:/var/jenkins_home/gc-%t.log",
+        "-XX:+UseGCLogFileRotation",
+        "-XX:NumberOfGCLogFiles=5",
+        "-XX:GCLogFileSize=20m",
+        "-XX:+PrintGCDetails",
+        "-XX:+PrintGCDateStamps",
+        "-XX:+PrintGCCause",
+    ]
@@ -19,4 +19,6 @@ class InfrastructureStack(cdk.Stack):
             self,
             "infrastructure-cluster",
             vpc=vpc,
+            # Registers the FARGATE and FARGATE_SPOT capacity providers for the agent templates
+            enable_fargate_capacity_providers=True,
         )
@@ -1,5 +1,9 @@
+import json
+
 from aws_cdk import (
     core as cdk,
+    aws_cloudwatch as cloudwatch,
+    aws_cloudwatch_actions as cloudwatch_actions,
     aws_ec2 as ec2,
     aws_elasticloadbalancingv2 as elb,
     aws_efs as efs,
@@ -8,6 +12,49 @@ from aws_cdk import (
     aws_ecr_assets as ecr_assets,
     aws_iam as iam,
     aws_logs as logs,
+    aws_s3 as s3,
+    aws_secretsmanager as secretsmanager,
+    aws_sns as sns,
+    aws_ssm as ssm,
+)
+
+from infrastructure.agents import (
+    DEFAULT_AGENT_SIZE_CLASSES,
+    agent_templates,
+    capacity_provider_strategy,
+)
+from infrastructure.controller import (
+    controller_home_path,
+    controller_java_opts,
+    controller_profile,
+    plugin_file,
+    teams,
+)
+from infrastructure.load_balancer import (
+    CONTROLLER_PORTS,
+    add_agent_listeners,
+    agent_endpoint,
+    configure_target_group,
+    load_balancer_options,
+)
+from infrastructure.log_pipeline import add_log_archive, agent_log_mode, log_retention
+from infrastructure.metrics import (
+    METRICS_NAMESPACE,
+    controller_dashboard_widgets,
+    controller_metric,
+)
+from infrastructure.storage import (
+    WORKSPACES_DIR,
+    configure_file_system,
+    file_system_options,
+)
+from infrastructure.wiring import (
+    allow_from,
+    memoize,
+    policy_statements,
+    subnet_cidrs,
+    subnets,
+    tcp,
 )
 
 
@@ -26,23 +73,16 @@ class JenkinsStack(cdk.Stack):
             self,
             "jenkins-fs",
             vpc=cluster.vpc,
-            performance_mode=efs.PerformanceMode.GENERAL_PURPOSE,
             removal_policy=cdk.RemovalPolicy.DESTROY,
-            vpc_subnets=ec2.SubnetSelection(
-                subnets=[
-                    ec2.Subnet.from_subnet_id(
-                        self, "jenkins-efs-subnet-1", props["jenkins_subnet_1"]
-                    ),
-                    ec2.Subnet.from_subnet_id(
-                        self, "jenkins-efs-subnet-2", props["jenkins_subnet_2"]
-                    ),
-                ]
-            ),
+            vpc_subnets=subnets(self, props["jenkins_subnet_1"], props["jenkins_subnet_2"]),
+            **file_system_options(props),
         )
 
+        configure_file_system(file_system, props)
+
         access_point = file_system.add_access_point(
             "jenkins-efs-access-point",
-            path="/",
+            path=controller_home_path(props),
             create_acl=efs.Acl(owner_gid="1000", owner_uid="1000", permissions="755"),
             posix_user=efs.PosixUser(gid="0", uid="0"),
         )
@@ -54,17 +94,9 @@ class JenkinsStack(cdk.Stack):
             "jenkins-lb",
             vpc=cluster.vpc,
             internet_facing=False,
-            vpc_subnets=ec2.SubnetSelection(
-                subnets=[
-                    ec2.Subnet.from_subnet_id(
-                        self, "infrastructure-subnet-1", props["alb_subnet_1"]
-                    ),
-                    ec2.Subnet.from_subnet_id(
-                        self, "infrastructure-subnet-2", props["alb_subnet_2"]
-                    ),
-                ]
-            ),
+            vpc_subnets=subnets(self, props["alb_subnet_1"], props["alb_subnet_2"]),
             security_group=sg_alb,
+            **load_balancer_options(props),
         )
 
         sg_jenkins = ec2.SecurityGroup(
@@ -74,34 +106,20 @@ class JenkinsStack(cdk.Stack):
             description="Jenkins Security Group for Controller and Agents",
         )
 
+        # The labels keep the logical IDs of the existing ingress rules
         sg_jenkins.connections.allow_from(
             other=sg_alb,
-            port_range=ec2.Port(
-                protocol=ec2.Protocol.TCP,
-                string_representation="Jenkins Listener Port",
-                from_port=8080,
-                to_port=8080,
-            ),
+            port_range=tcp(self, 8080, "Jenkins Listener Port"),
             description="Allow connections from Load Balancer Security Group",
         )
 
         sg_jenkins.connections.allow_internally(
-            port_range=ec2.Port(
-                protocol=ec2.Protocol.TCP,
-                string_representation="Jenkins Listener Port",
-                from_port=8080,
-                to_port=8080,
-            ),
+            port_range=tcp(self, 8080, "Jenkins Listener Port"),
             description="Allow connections from Jenkins Agents in the same Security Group",
         )
 
         sg_jenkins.connections.allow_internally(
-            port_range=ec2.Port(
-                protocol=ec2.Protocol.TCP,
-                string_representation="Jenkins Agent Port",
-                from_port=50000,
-                to_port=50000,
-            ),
+            port_range=tcp(self, 50000, "Jenkins Agent Port"),
             description="Allow connections from Jenkins Agent on Agent Port(50000)",
         )
 
@@ -123,13 +141,43 @@ class JenkinsStack(cdk.Stack):
             assumed_by=iam.ServicePrincipal("ecs-tasks.amazonaws.com"),
         )
 
+        # Shared cache for dependencies and build outputs of the ephemeral agents
+        build_cache = s3.Bucket(
+            self,
+            "BuildCacheBucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            removal_policy=cdk.RemovalPolicy.DESTROY,
+            lifecycle_rules=[
+                s3.LifecycleRule(
+                    expiration=cdk.Duration.days(
+                        props.get("build_cache_expiration_days", 14)
+                    ),
+                    abort_incomplete_multipart_upload_after=cdk.Duration.days(1),
+                )
+            ],
+        )
+
+        build_cache.grant_read_write(agent_task_role)
+
+        agent_environment = {
+            "BUILD_CACHE_BUCKET": build_cache.bucket_name,
+            "BUILD_CACHE_URL": f"s3://{build_cache.bucket_name}/",
+            "AWS_DEFAULT_REGION": self.region,
+            **(props.get("agent_environment") or {}),
+        }
+
         agent_log_group = logs.LogGroup(
             self,
             "AgentLogGroup",
-            retention=logs.RetentionDays.ONE_WEEK,
+            retention=log_retention(props.get("agent_log_retention_days", 7)),
             removal_policy=cdk.RemovalPolicy.DESTROY,
         )
 
+        if props.get("agent_log_archive"):
+            add_log_archive(self, agent_log_group, props)
+
         agent_log_stream = logs.LogStream(
             self,
             "AgentLogStream",
@@ -138,54 +186,349 @@ class JenkinsStack(cdk.Stack):
         )
 
         self.controller_image = ecr_assets.DockerImageAsset(
-            self, "jenkins-controller-image", directory="./docker/jenkins-controller"
+            self,
+            "jenkins-controller-image",
+            directory="./docker/jenkins-controller",
+            build_args={
+                "PLUGIN_FILE": plugin_file(props.get("controller_plugin_profile", "full"))
+            },
+        )
+
+        self.agent_image = ecr_assets.DockerImageAsset(
+            self, "jenkins-agent-image", directory="./docker/jenkins-agent"
+        )
+
+        profile = controller_profile(props.get("controller_profile", "small"))
+
+        # Time ECS ignores failing health checks after a controller starts; measure
+        # startup with benchmarks/controller_startup.py before lowering it.
+        grace_period = cdk.Duration.seconds(props.get("controller_grace_period_seconds", 300))
+
+        # Agent settings are read from this parameter by the controller's CasC watcher,
+        # so changing them reloads the configuration instead of redeploying the controller.
+        casc_parameter = ssm.StringParameter(
+            self,
+            "CascParameter",
+            description="Jenkins CasC settings, applied by casc_watcher.py",
+            tier=ssm.ParameterTier.INTELLIGENT_TIERING,
+            string_value=self.to_json_string(
+                {
+                    "subnet_ids": f"{props['jenkins_subnet_1']},{props['jenkins_subnet_2']}",
+                    "security_group_ids": sg_jenkins.security_group_id,
+                    "agent_image": self.agent_image.image_uri,
+                    "agent_environment": json.dumps(agent_environment),
+                    "agent_templates": agent_templates(
+                        props.get("agent_size_classes") or DEFAULT_AGENT_SIZE_CLASSES,
+                        capacity_provider_strategy(
+                            spot_weight=props.get("agent_spot_weight", 4),
+                            on_demand_weight=props.get("agent_on_demand_weight", 1),
+                            on_demand_base=props.get("agent_on_demand_base", 0),
+                        ),
+                    ),
+                    "agent_pool_max_agents": str(props.get("agent_pool_max_agents", 50)),
+                    "agent_retention_minutes": str(
+                        props.get("agent_retention_minutes", 10)
+                    ),
+                    "agent_log_mode": agent_log_mode(props),
+                    "agent_log_buffer_size": props.get("agent_log_buffer_size", "25m"),
+                }
+            ),
         )
 
+        casc_reload_token = secretsmanager.Secret(
+            self,
+            "CascReloadToken",
+            description="Token for the Jenkins CasC reload endpoint",
+            generate_secret_string=secretsmanager.SecretStringGenerator(
+                exclude_punctuation=True, password_length=32
+            ),
+        )
+
+        controller_subnets = subnets(
+            self, props["jenkins_subnet_1"], props["jenkins_subnet_2"]
+        )
+
+        agent_nlb = None
+        if agent_endpoint(props) == "nlb":
+            # Stable internal address for agents that survives controller task replacement
+            agent_nlb = elb.NetworkLoadBalancer(
+                self,
+                "jenkins-agent-nlb",
+                vpc=cluster.vpc,
+                internet_facing=False,
+                vpc_subnets=controller_subnets,
+            )
+
+            # The load balancer forwards to IP targets from its own addresses in
+            # the Jenkins subnets, not from the agents' addresses
+            for cidr in subnet_cidrs(
+                self, cluster.vpc, props["jenkins_subnet_1"], props["jenkins_subnet_2"]
+            ):
+                for port in CONTROLLER_PORTS:
+                    sg_jenkins.add_ingress_rule(
+                        peer=ec2.Peer.ipv4(cidr),
+                        connection=tcp(self, port),
+                        description="Allow agent traffic through the agent load balancer",
+                    )
+
+        controller_environment = {
+            "JAVA_OPTS": " ".join(
+                controller_java_opts()
+                + [
+                    "-Djenkins.install.runSetupWizard=false",
+                    # Provision cloud agents as soon as the queue grows instead of
+                    # waiting for the load statistics to settle.
+                    "-Dhudson.slaves.NodeProvisioner.initialDelay=0",
+                    "-Dhudson.slaves.NodeProvisioner.MARGIN=50",
+                    "-Dhudson.slaves.NodeProvisioner.MARGIN0=0.85",
+                ]
+                + (
+                    # Jenkins substitutes the job name itself
+                    [f"-Djenkins.model.Jenkins.workspacesDir={WORKSPACES_DIR}/${{ITEM_FULL_NAME}}"]
+                    if props.get("ephemeral_workspaces")
+                    else []
+                )
+            ),
+            # https://github.com/jenkinsci/configuration-as-code-plugin/blob/leader/README.md#getting-started
+            "CASC_JENKINS_CONFIG": "/jenkins.yaml",
+            "cluster_arn": cluster.cluster_arn,
+            "aws_region": self.region,
+            # URL agents use to reach the controller
+            "jenkins_url": f"http://{alb.load_balancer_dns_name}/",
+            "admin_password": props["admin_password"],
+            "execution_role_arn": agent_execution_role.role_arn,
+            "task_role_arn": agent_task_role.role_arn,
+            "worker_log_group": agent_log_group.log_group_name,
+            "worker_log_stream_prefix": agent_log_stream.log_stream_name,
+            "agent_pool_min_idle": str(props.get("agent_pool_min_idle", 0)),
+            "casc_parameter": casc_parameter.parameter_name,
+            "casc_poll_seconds": str(props.get("casc_poll_seconds", 30)),
+            "metrics_namespace": METRICS_NAMESPACE,
+            "controller_name": self.stack_name,
+        }
+
+        if agent_nlb:
+            controller_environment[
+                "jenkins_url"
+            ] = f"http://{agent_nlb.load_balancer_dns_name}:8080/"
+            controller_environment[
+                "agent_tunnel"
+            ] = f"{agent_nlb.load_balancer_dns_name}:50000"
+
+        controller_secrets = {
+            "CASC_RELOAD_TOKEN": ecs.Secret.from_secrets_manager(casc_reload_token),
+        }
+
         self.jenkins_service = ecs_patterns.ApplicationLoadBalancedFargateService(
             self,
             "jenkins-service",
             cluster=cluster,
-            cpu=1024,
-            memory_limit_mib=2048,
-            health_check_grace_period=cdk.Duration.minutes(5),
+            cpu=profile["cpu"],
+            memory_limit_mib=profile["memory"],
+            health_check_grace_period=grace_period,
             task_image_options={
                 "container_name": "jenkins-controller",
                 "image": ecs.ContainerImage.from_docker_image_asset(
                     self.controller_image
                 ),
                 "container_port": 8080,
-                "environment": {
-                    "JAVA_OPTS": "-Djenkins.install.runSetupWizard=false",
-                    # https://github.com/jenkinsci/configuration-as-code-plugin/blob/leader/README.md#getting-started
-                    "CASC_JENKINS_CONFIG": "/jenkins.yaml",
-                    "cluster_arn": cluster.cluster_arn,
-                    "aws_region": self.region,
-                    "jenkins_url": f"http://{alb.load_balancer_dns_name}/",  # Once, the Jenkins is fully deployed this needs to be updated to container IP Address and Port
-                    "admin_password": props["admin_password"],
-                    "subnet_ids": f"{props['jenkins_subnet_1']},{props['jenkins_subnet_2']}",
-                    "security_group_ids": sg_jenkins.security_group_id,
-                    "execution_role_arn": agent_execution_role.role_arn,
-                    "task_role_arn": agent_task_role.role_arn,
-                    "worker_log_group": agent_log_group.log_group_name,
-                    "worker_log_stream_prefix": agent_log_stream.log_stream_name,
-                },
+                "environment": controller_environment,
+                "secrets": controller_secrets,
             },
             desired_count=1,
             load_balancer=alb,
-            task_subnets=ec2.SubnetSelection(
-                subnets=[
-                    ec2.Subnet.from_subnet_id(
-                        self, "jenkins-subnet-1", props["jenkins_subnet_1"]
-                    ),
-                    ec2.Subnet.from_subnet_id(
-                        self, "jenkins-subnet-2", props["jenkins_subnet_2"]
-                    ),
+            task_subnets=controller_subnets,
+            security_groups=[sg_jenkins],
+        )
+
+        configure_target_group(self.jenkins_service.target_group, props)
+
+        controller_grants = {
+            "cluster": cluster,
+            "file_system": file_system,
+            "casc_parameter": casc_parameter,
+            "agent_roles": [agent_task_role, agent_execution_role],
+            "agent_log_group": agent_log_group,
+            "security_group": sg_jenkins,
+        }
+
+        self.__configure_controller(
+            self.jenkins_service.service, access_point, props, **controller_grants
+        )
+
+        if agent_nlb:
+            add_agent_listeners(agent_nlb, self.jenkins_service.service, props)
+
+        # Team controllers share the load balancer, file system, agent settings and
+        # images with the default controller, each with its own home and ECS cloud.
+        self.team_services = {}
+        for priority, team in enumerate(teams(props.get("teams")), start=1):
+            scope = cdk.Construct(self, f"team-{team['name']}")
+            team_profile = controller_profile(
+                team.get("profile", props.get("controller_profile", "small"))
+            )
+
+            if team.get("host"):
+                jenkins_url = f"http://{team['host']}/"
+                conditions = [elb.ListenerCondition.host_headers([team["host"]])]
+                prefix = ""
+            else:
+                jenkins_url = f"http://{alb.load_balancer_dns_name}/{team['name']}/"
+                conditions = [
+                    elb.ListenerCondition.path_patterns(
+                        [f"/{team['name']}", f"/{team['name']}/*"]
+                    )
                 ]
+                prefix = f"/{team['name']}"
+
+            task_definition = ecs.FargateTaskDefinition(
+                scope,
+                "task-definition",
+                cpu=team_profile["cpu"],
+                memory_limit_mib=team_profile["memory"],
+            )
+
+            team_environment = {
+                **controller_environment,
+                "jenkins_url": jenkins_url,
+                "controller_name": f"{self.stack_name}-{team['name']}",
+                "cloud_name": f"fargate-agents-{team['name']}",
+            }
+            if agent_nlb:
+                # Each team gets its own pair of ports on the agent load balancer
+                team_environment["jenkins_url"] = (
+                    f"http://{agent_nlb.load_balancer_dns_name}:{8080 + priority}{prefix}/"
+                )
+                team_environment["agent_tunnel"] = (
+                    f"{agent_nlb.load_balancer_dns_name}:{50000 + priority}"
+                )
+            if prefix:
+                # Serve Jenkins under the path the listener rule forwards
+                team_environment["JENKINS_OPTS"] = f"--prefix={prefix}"
+                team_environment["JENKINS_PREFIX"] = prefix
+
+            task_definition.add_container(
+                "jenkins-controller",
+                image=ecs.ContainerImage.from_docker_image_asset(self.controller_image),
+                environment=team_environment,
+                secrets=controller_secrets,
+                logging=ecs.LogDrivers.aws_logs(stream_prefix=team["name"]),
+                port_mappings=[ecs.PortMapping(container_port=8080)],
+            )
+
+            service = ecs.FargateService(
+                scope,
+                "service",
+                cluster=cluster,
+                task_definition=task_definition,
+                desired_count=1,
+                health_check_grace_period=grace_period,
+                vpc_subnets=controller_subnets,
+                security_groups=[sg_jenkins],
+            )
+
+            target_group = self.jenkins_service.listener.add_targets(
+                f"team-{team['name']}",
+                priority=priority,
+                conditions=conditions,
+                port=8080,
+                protocol=elb.ApplicationProtocol.HTTP,
+                targets=[
+                    service.load_balancer_target(
+                        container_name="jenkins-controller", container_port=8080
+                    )
+                ],
+            )
+            configure_target_group(target_group, props, prefix)
+
+            team_access_point = efs.AccessPoint(
+                scope,
+                "efs-access-point",
+                file_system=file_system,
+                path=f"/teams/{team['name']}",
+                create_acl=efs.Acl(owner_gid="1000", owner_uid="1000", permissions="755"),
+                posix_user=efs.PosixUser(gid="0", uid="0"),
+            )
+
+            self.__configure_controller(service, team_access_point, props, **controller_grants)
+            if agent_nlb:
+                add_agent_listeners(agent_nlb, service, props, offset=priority)
+            self.team_services[team["name"]] = service
+
+        # Alarm before the controller stalls on CPU or memory pressure
+        alarms = [
+            cloudwatch.Alarm(
+                self,
+                "ControllerCpuAlarm",
+                metric=self.jenkins_service.service.metric_cpu_utilization(),
+                threshold=props.get("controller_cpu_alarm_percent", 80),
+                evaluation_periods=3,
+                alarm_description="Jenkins controller CPU utilization is high",
             ),
-            security_groups=[sg_jenkins],
+            cloudwatch.Alarm(
+                self,
+                "ControllerMemoryAlarm",
+                metric=self.jenkins_service.service.metric_memory_utilization(),
+                threshold=props.get("controller_memory_alarm_percent", 85),
+                evaluation_periods=3,
+                alarm_description="Jenkins controller memory utilization is high",
+            ),
+            cloudwatch.Alarm(
+                self,
+                "QueueWaitAlarm",
+                metric=controller_metric(self.stack_name, "QueueWaitTime", "p95"),
+                threshold=props.get("queue_wait_alarm_seconds", 300),
+                evaluation_periods=5,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+                alarm_description="Builds wait too long in the Jenkins queue",
+            ),
+            cloudwatch.Alarm(
+                self,
+                "FailedProvisionsAlarm",
+                metric=controller_metric(self.stack_name, "FailedProvisions", "Sum"),
+                threshold=1,
+                evaluation_periods=3,
+                datapoints_to_alarm=2,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+                alarm_description="Jenkins fails to provision ECS agents",
+            ),
+        ]
+
+        if props.get("alarm_topic_arn"):
+            alarm_topic = sns.Topic.from_topic_arn(
+                self, "AlarmTopic", props["alarm_topic_arn"]
+            )
+            for alarm in alarms:
+                alarm.add_alarm_action(cloudwatch_actions.SnsAction(alarm_topic))
+
+        cloudwatch.Dashboard(
+            self,
+            "JenkinsDashboard",
+            widgets=controller_dashboard_widgets(self.stack_name)
+            + [
+                [
+                    cloudwatch.AlarmWidget(alarm=alarms[0], title="Controller CPU"),
+                    cloudwatch.AlarmWidget(alarm=alarms[1], title="Controller memory"),
+                ]
+            ],
         )
 
-        self.jenkins_service.task_definition.add_volume(
+    def __configure_controller(
+        self,
+        service: ecs.FargateService,
+        access_point: efs.AccessPoint,
+        props,
+        cluster: ecs.Cluster,
+        file_system: efs.FileSystem,
+        casc_parameter: ssm.StringParameter,
+        agent_roles: list,
+        agent_log_group: logs.LogGroup,
+        security_group: ec2.SecurityGroup,
+    ):
+        """Storage, ports and permissions shared by every controller task."""
+        task_definition = service.task_definition
+
+        task_definition.add_volume(
             name="jenkins-efs",
             efs_volume_configuration=ecs.EfsVolumeConfiguration(
                 file_system_id=file_system.file_system_id,
@@ -197,7 +540,7 @@ class JenkinsStack(cdk.Stack):
             ),
         )
 
-        self.jenkins_service.task_definition.default_container.add_mount_points(
+        task_definition.default_container.add_mount_points(
             ecs.MountPoint(
                 container_path="/var/jenkins_home",
                 read_only=False,
@@ -205,88 +548,88 @@ class JenkinsStack(cdk.Stack):
             )
         )
 
-        self.jenkins_service.task_definition.default_container.add_port_mappings(
+        if props.get("ephemeral_workspaces"):
+            # Pipeline checkouts on the controller stay on task storage instead of EFS
+            task_definition.add_volume(name="jenkins-workspace")
+            task_definition.default_container.add_mount_points(
+                ecs.MountPoint(
+                    container_path=WORKSPACES_DIR,
+                    read_only=False,
+                    source_volume="jenkins-workspace",
+                )
+            )
+
+        if props.get("controller_ephemeral_storage_gib"):
+            task_definition.node.default_child.add_property_override(
+                "EphemeralStorage.SizeInGiB", props["controller_ephemeral_storage_gib"]
+            )
+
+        task_definition.default_container.add_port_mappings(
             ecs.PortMapping(container_port=50000, host_port=50000)
         )
 
-        self.jenkins_service.target_group.configure_health_check(path="/login")
+        casc_parameter.grant_read(task_definition.task_role)
+
+        # Every controller gets the same statements, built once for the stack
+        for statement in memoize(
+            self,
+            "controller-statements",
+            lambda: self.__controller_statements(cluster, agent_roles, agent_log_group),
+        ):
+            task_definition.add_to_task_role_policy(statement)
+
+        allow_from(self, file_system, security_group)
 
-        # IAM Statements to allow jenkins ecs plugin to talk to ECS as well as the Jenkins cluster #
-        self.jenkins_service.service.task_definition.add_to_task_role_policy(
-            iam.PolicyStatement(
-                actions=[
+    def __controller_statements(
+        self, cluster: ecs.Cluster, agent_roles: list, agent_log_group: logs.LogGroup
+    ) -> list:
+        """IAM statements for the jenkins ecs plugin to talk to ECS and the Jenkins cluster."""
+        cluster_tasks = {
+            "resources": ["arn:aws:ecs:{0}:{1}:task/*".format(self.region, self.account)],
+            "conditions": {"ForAnyValue:ArnEquals": {"ecs:cluster": cluster.cluster_arn}},
+        }
+
+        return policy_statements(
+            {
+                "actions": [
                     "ecs:RegisterTaskDefinition",
                     "ecs:DeregisterTaskDefinition",
                     "ecs:ListClusters",
                     "ecs:DescribeContainerInstances",
                     "ecs:ListTaskDefinitions",
                     "ecs:DescribeTaskDefinition",
-                    "ecs:DescribeTasks",
                 ],
-                resources=["*"],
-            )
-        )
-
-        self.jenkins_service.service.task_definition.add_to_task_role_policy(
-            iam.PolicyStatement(
-                actions=["ecs:ListContainerInstances"], resources=[cluster.cluster_arn]
-            )
-        )
-
-        self.jenkins_service.service.task_definition.add_to_task_role_policy(
-            iam.PolicyStatement(
-                actions=["ecs:RunTask"],
-                resources=[
+                "resources": ["*"],
+            },
+            {"actions": ["ecs:ListContainerInstances"], "resources": [cluster.cluster_arn]},
+            {
+                "actions": ["ecs:RunTask"],
+                "resources": [
                     "arn:aws:ecs:{0}:{1}:task-definition/fargate-agents*".format(
                         self.region,
                         self.account,
                     )
                 ],
-            )
-        )
-
-        self.jenkins_service.service.task_definition.add_to_task_role_policy(
-            iam.PolicyStatement(
-                actions=["ecs:StopTask"],
-                resources=[
-                    "arn:aws:ecs:{0}:{1}:task/*".format(self.region, self.account)
-                ],
-                conditions={
-                    "ForAnyValue:ArnEquals": {"ecs:cluster": cluster.cluster_arn}
-                },
-            )
-        )
-
-        self.jenkins_service.service.task_definition.add_to_task_role_policy(
-            iam.PolicyStatement(
-                actions=["ecs:DescribeTasks"],
-                resources=[
-                    "arn:aws:ecs:{0}:{1}:task/*".format(self.region, self.account)
-                ],
-                conditions={
-                    "ForAnyValue:ArnEquals": {"ecs:cluster": cluster.cluster_arn}
-                },
-            )
-        )
-
-        self.jenkins_service.service.task_definition.add_to_task_role_policy(
-            iam.PolicyStatement(
-                actions=["iam:PassRole"],
-                resources=[agent_task_role.role_arn, agent_execution_role.role_arn],
-            )
-        )
-
-        self.jenkins_service.service.task_definition.add_to_task_role_policy(
-            iam.PolicyStatement(
-                actions=[
+            },
+            {"actions": ["ecs:StopTask"], **cluster_tasks},
+            {"actions": ["ecs:DescribeTasks"], **cluster_tasks},
+            {
+                "actions": ["iam:PassRole"],
+                "resources": [role.role_arn for role in agent_roles],
+            },
+            {
+                "actions": [
                     "logs:DescribeLogStreams",
                     "logs:FilterLogEvents",
                     "logs:CreateLogStream",
                     "logs:PutLogEvents",
                     "logs:GetLogEvents",
                 ],
-                resources=[agent_log_group.log_group_arn],
-            )
+                "resources": [agent_log_group.log_group_arn],
+            },
+            {
+                "actions": ["cloudwatch:PutMetricData"],
+                "resources": ["*"],
+                "conditions": {"StringEquals": {"cloudwatch:namespace": METRICS_NAMESPACE}},
+            },
         )
-
-        file_system.connections.allow_default_port_from(self.jenkins_service.service)
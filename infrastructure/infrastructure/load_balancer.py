@@ -0,0 +1,87 @@
+from aws_cdk import core as cdk, aws_elasticloadbalancingv2 as elb
+
+# Answers without rendering a page, and with 503 until Jenkins has finished starting
+DEFAULT_HEALTH_CHECK_PATH = "/whoAmI/api/json"
+
+
+def load_balancer_options(props) -> dict:
+    """Keyword arguments for `elb.ApplicationLoadBalancer` from the `alb_*` stack props.
+
+    The idle timeout has to outlast the Blue Ocean and SSE connections that stay
+    open without traffic.
+    """
+    return {
+        "idle_timeout": cdk.Duration.seconds(props.get("alb_idle_timeout_seconds", 300)),
+        "http2_enabled": props.get("alb_http2_enabled", True),
+    }
+
+
+def health_check_options(props, prefix: str = "") -> dict:
+    """Health check settings for a controller served under `prefix`."""
+    interval = props.get("alb_health_check_interval_seconds", 15)
+    timeout = props.get("alb_health_check_timeout_seconds", 5)
+    if not 5 <= interval <= 300:
+        raise ValueError("alb_health_check_interval_seconds must be between 5 and 300")
+    if not 2 <= timeout < interval:
+        raise ValueError(
+            "alb_health_check_timeout_seconds must be at least 2 and less than the interval"
+        )
+
+    return {
+        "path": prefix + props.get("alb_health_check_path", DEFAULT_HEALTH_CHECK_PATH),
+        "interval": cdk.Duration.seconds(interval),
+        "timeout": cdk.Duration.seconds(timeout),
+        "healthy_threshold_count": props.get("alb_healthy_threshold", 2),
+        "unhealthy_threshold_count": props.get("alb_unhealthy_threshold", 3),
+        "healthy_http_codes": "200",
+    }
+
+
+def configure_target_group(target_group: elb.ApplicationTargetGroup, props, prefix: str = ""):
+    """Applies the health check, deregistration delay and stickiness settings."""
+    target_group.configure_health_check(**health_check_options(props, prefix))
+
+    # Controllers run as a single task, so in-flight requests only need a short drain
+    target_group.set_attribute(
+        "deregistration_delay.timeout_seconds",
+        str(props.get("alb_deregistration_delay_seconds", 30)),
+    )
+
+    stickiness_minutes = props.get("alb_stickiness_minutes", 0)
+    if stickiness_minutes:
+        target_group.enable_cookie_stickiness(cdk.Duration.minutes(stickiness_minutes))
+
+
+AGENT_ENDPOINTS = ["nlb", "alb"]
+
+# Ports the controller listens on for HTTP and inbound agents
+CONTROLLER_PORTS = [8080, 50000]
+
+
+def agent_endpoint(props) -> str:
+    endpoint = props.get("agent_endpoint", "nlb")
+    if endpoint not in AGENT_ENDPOINTS:
+        raise ValueError(f"agent_endpoint must be one of {AGENT_ENDPOINTS}, got '{endpoint}'")
+    return endpoint
+
+
+def add_agent_listeners(nlb: elb.NetworkLoadBalancer, service, props, offset: int = 0):
+    """Forwards the controller ports, shifted by `offset` on the load balancer, to `service`.
+
+    Controllers behind the same load balancer each use their own `offset`.
+    """
+    for container_port in CONTROLLER_PORTS:
+        port = container_port + offset
+        listener = nlb.add_listener(f"listener-{port}", port=port)
+        listener.add_targets(
+            f"controller-{port}",
+            port=container_port,
+            targets=[
+                service.load_balancer_target(
+                    container_name="jenkins-controller", container_port=container_port
+                )
+            ],
+            deregistration_delay=cdk.Duration.seconds(
+                props.get("alb_deregistration_delay_seconds", 30)
+            ),
+        )
@@ -0,0 +1,136 @@
+from aws_cdk import (
+    core as cdk,
+    aws_iam as iam,
+    aws_kinesisfirehose as firehose,
+    aws_logs as logs,
+    aws_s3 as s3,
+)
+
+AGENT_LOG_MODES = ["blocking", "non-blocking"]
+
+# CloudWatch Logs only accepts these retention periods
+LOG_RETENTION_DAYS = {
+    1: logs.RetentionDays.ONE_DAY,
+    3: logs.RetentionDays.THREE_DAYS,
+    5: logs.RetentionDays.FIVE_DAYS,
+    7: logs.RetentionDays.ONE_WEEK,
+    14: logs.RetentionDays.TWO_WEEKS,
+    30: logs.RetentionDays.ONE_MONTH,
+    60: logs.RetentionDays.TWO_MONTHS,
+    90: logs.RetentionDays.THREE_MONTHS,
+    180: logs.RetentionDays.SIX_MONTHS,
+    365: logs.RetentionDays.ONE_YEAR,
+}
+
+
+def agent_log_mode(props) -> str:
+    mode = props.get("agent_log_mode", "non-blocking")
+    if mode not in AGENT_LOG_MODES:
+        raise ValueError(f"agent_log_mode must be one of {AGENT_LOG_MODES}, got '{mode}'")
+    return mode
+
+
+def log_retention(days: int) -> logs.RetentionDays:
+    if days not in LOG_RETENTION_DAYS:
+        raise ValueError(f"Log retention must be one of {list(LOG_RETENTION_DAYS)} days")
+    return LOG_RETENTION_DAYS[days]
+
+
+def add_log_archive(scope: cdk.Construct, log_group: logs.LogGroup, props) -> s3.Bucket:
+    """Copies every event of `log_group` to S3 through Kinesis Data Firehose.
+
+    CloudWatch keeps the recent logs that the Jenkins console reads, the bucket keeps
+    the full history on cheaper storage classes.
+    """
+    expiration_days = props.get("agent_log_archive_expiration_days", 365)
+    if expiration_days <= 90:
+        raise ValueError("agent_log_archive_expiration_days must be more than 90")
+
+    bucket = s3.Bucket(
+        scope,
+        "AgentLogArchiveBucket",
+        encryption=s3.BucketEncryption.S3_MANAGED,
+        block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+        enforce_ssl=True,
+        removal_policy=cdk.RemovalPolicy.RETAIN,
+        lifecycle_rules=[
+            s3.LifecycleRule(
+                transitions=[
+                    s3.Transition(
+                        storage_class=s3.StorageClass.INFREQUENT_ACCESS,
+                        transition_after=cdk.Duration.days(30),
+                    ),
+                    s3.Transition(
+                        storage_class=s3.StorageClass.GLACIER,
+                        transition_after=cdk.Duration.days(90),
+                    ),
+                ],
+                expiration=cdk.Duration.days(expiration_days),
+            )
+        ],
+    )
+
+    delivery_role = iam.Role(
+        scope,
+        "AgentLogArchiveDeliveryRole",
+        assumed_by=iam.ServicePrincipal("firehose.amazonaws.com"),
+    )
+    # The actions Firehose needs for an S3 destination, including the bucket
+    # level reads it checks the destination with
+    delivery_role.add_to_policy(
+        iam.PolicyStatement(
+            actions=[
+                "s3:AbortMultipartUpload",
+                "s3:GetBucketLocation",
+                "s3:GetObject",
+                "s3:ListBucket",
+                "s3:ListBucketMultipartUploads",
+                "s3:PutObject",
+            ],
+            resources=[bucket.bucket_arn, bucket.arn_for_objects("*")],
+        )
+    )
+
+    # Subscription payloads are already gzip compressed
+    delivery_stream = firehose.CfnDeliveryStream(
+        scope,
+        "AgentLogArchiveStream",
+        delivery_stream_type="DirectPut",
+        extended_s3_destination_configuration=firehose.CfnDeliveryStream.ExtendedS3DestinationConfigurationProperty(
+            bucket_arn=bucket.bucket_arn,
+            role_arn=delivery_role.role_arn,
+            prefix="agents/",
+            error_output_prefix="errors/",
+            compression_format="UNCOMPRESSED",
+            buffering_hints=firehose.CfnDeliveryStream.BufferingHintsProperty(
+                interval_in_seconds=300, size_in_m_bs=64
+            ),
+        ),
+    )
+    delivery_stream.node.add_dependency(delivery_role)
+
+    subscription_role = iam.Role(
+        scope,
+        "AgentLogArchiveSubscriptionRole",
+        assumed_by=iam.ServicePrincipal(
+            f"logs.{cdk.Stack.of(scope).region}.amazonaws.com"
+        ),
+    )
+    subscription_role.add_to_policy(
+        iam.PolicyStatement(
+            actions=["firehose:PutRecord", "firehose:PutRecordBatch"],
+            resources=[delivery_stream.attr_arn],
+        )
+    )
+
+    subscription = logs.CfnSubscriptionFilter(
+        scope,
+        "AgentLogArchiveSubscription",
+        log_group_name=log_group.log_group_name,
+        destination_arn=delivery_stream.attr_arn,
+        filter_pattern="",
+        role_arn=subscription_role.role_arn,
+    )
+    subscription.node.add_dependency(subscription_role)
+
+    return bucket
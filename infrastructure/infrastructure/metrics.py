@@ -0,0 +1,53 @@
+from aws_cdk import core as cdk, aws_cloudwatch as cloudwatch
+
+# Namespace that `metrics.groovy` in the controller image publishes to
+METRICS_NAMESPACE = "Jenkins"
+
+
+def controller_metric(controller: str, name: str, statistic: str = "Average"):
+    return cloudwatch.Metric(
+        namespace=METRICS_NAMESPACE,
+        metric_name=name,
+        dimensions_map={"Controller": controller},
+        statistic=statistic,
+        period=cdk.Duration.minutes(1),
+    )
+
+
+def controller_dashboard_widgets(controller: str) -> list:
+    """Dashboard rows for the queue, agent provisioning and executor metrics."""
+    return [
+        [
+            cloudwatch.GraphWidget(
+                title="Queue length",
+                left=[
+                    controller_metric(controller, "QueueLength", "Maximum"),
+                    controller_metric(controller, "BuildableItems", "Maximum"),
+                ],
+            ),
+            cloudwatch.GraphWidget(
+                title="Queue wait (seconds)",
+                left=[
+                    controller_metric(controller, "QueueWaitTime", "p50"),
+                    controller_metric(controller, "QueueWaitTime", "p95"),
+                ],
+            ),
+        ],
+        [
+            cloudwatch.GraphWidget(
+                title="Agent launch time (seconds)",
+                left=[
+                    controller_metric(controller, "AgentLaunchTime", "p50"),
+                    controller_metric(controller, "AgentLaunchTime", "p95"),
+                ],
+                right=[controller_metric(controller, "FailedProvisions", "Sum")],
+            ),
+            cloudwatch.GraphWidget(
+                title="Executors",
+                left=[
+                    controller_metric(controller, "BusyExecutors", "Average"),
+                    controller_metric(controller, "TotalExecutors", "Average"),
+                ],
+            ),
+        ],
+    ]
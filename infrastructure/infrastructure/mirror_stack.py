@@ -0,0 +1,182 @@
+from aws_cdk import (
+    core as cdk,
+    aws_ec2 as ec2,
+    aws_elasticloadbalancingv2 as elb,
+    aws_efs as efs,
+    aws_ecs as ecs,
+    aws_ecs_patterns as ecs_patterns,
+    aws_ecr_assets as ecr_assets,
+    aws_secretsmanager as secretsmanager,
+)
+
+from infrastructure.wiring import subnets, tcp
+
+
+class MirrorStack(cdk.Stack):
+    """Pull-through mirror for Maven, npm, PyPI and container images.
+
+    Runs Nexus Repository as a Fargate service on the shared cluster, behind an
+    internal load balancer reachable from the VPC, and adds ECR pull-through
+    cache rules for public container registries.
+    """
+
+    def __init__(
+        self,
+        scope: cdk.Construct,
+        construct_id: str,
+        cluster: ecs.Cluster,
+        props,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        file_system = efs.FileSystem(
+            self,
+            "mirror-fs",
+            vpc=cluster.vpc,
+            performance_mode=efs.PerformanceMode.GENERAL_PURPOSE,
+            removal_policy=cdk.RemovalPolicy.RETAIN,
+            vpc_subnets=subnets(self, props["jenkins_subnet_1"], props["jenkins_subnet_2"]),
+        )
+
+        # Nexus runs as uid/gid 200
+        access_point = file_system.add_access_point(
+            "mirror-efs-access-point",
+            path="/nexus-data",
+            create_acl=efs.Acl(owner_gid="200", owner_uid="200", permissions="755"),
+            posix_user=efs.PosixUser(gid="200", uid="200"),
+        )
+
+        sg_alb = ec2.SecurityGroup(self, "sg-mirror-alb", vpc=cluster.vpc)
+        sg_alb.add_ingress_rule(
+            peer=ec2.Peer.ipv4(cluster.vpc.vpc_cidr_block),
+            connection=tcp(self, 80),
+            description="Allow package manager traffic from the VPC",
+        )
+
+        alb = elb.ApplicationLoadBalancer(
+            self,
+            "mirror-lb",
+            vpc=cluster.vpc,
+            internet_facing=False,
+            vpc_subnets=subnets(self, props["alb_subnet_1"], props["alb_subnet_2"]),
+            security_group=sg_alb,
+        )
+
+        self.mirror_service = ecs_patterns.ApplicationLoadBalancedFargateService(
+            self,
+            "mirror-service",
+            cluster=cluster,
+            cpu=2048,
+            memory_limit_mib=4096,
+            health_check_grace_period=cdk.Duration.minutes(5),
+            task_image_options={
+                "container_name": "nexus",
+                "image": ecs.ContainerImage.from_registry(
+                    props.get("mirror_image", "sonatype/nexus3:3.32.2")
+                ),
+                "container_port": 8081,
+                "environment": {
+                    "INSTALL4J_ADD_VM_PARAMS": "-Xms1200m -Xmx1200m -XX:MaxDirectMemorySize=2g",
+                    # The init container replaces the default password on first start
+                    "NEXUS_SECURITY_RANDOMPASSWORD": "false",
+                },
+            },
+            desired_count=1,
+            load_balancer=alb,
+            # Only the VPC CIDR rule on the load balancer's security group applies
+            open_listener=False,
+            task_subnets=subnets(self, props["jenkins_subnet_1"], props["jenkins_subnet_2"]),
+        )
+
+        admin_password = secretsmanager.Secret(
+            self,
+            "MirrorAdminPassword",
+            description="Password of the Nexus admin user of the dependency mirror",
+            generate_secret_string=secretsmanager.SecretStringGenerator(
+                exclude_punctuation=True, password_length=32
+            ),
+        )
+
+        # Creates the npm and PyPI proxy repositories the agents are pointed at
+        init_container = self.mirror_service.task_definition.add_container(
+            "nexus-init",
+            image=ecs.ContainerImage.from_docker_image_asset(
+                ecr_assets.DockerImageAsset(
+                    self, "mirror-init-image", directory="./docker/mirror-init"
+                )
+            ),
+            essential=False,
+            secrets={
+                "NEXUS_ADMIN_PASSWORD": ecs.Secret.from_secrets_manager(admin_password)
+            },
+            logging=ecs.LogDrivers.aws_logs(stream_prefix="nexus-init"),
+        )
+        init_container.add_container_dependencies(
+            ecs.ContainerDependency(
+                container=self.mirror_service.task_definition.default_container,
+                condition=ecs.ContainerDependencyCondition.START,
+            )
+        )
+
+        self.mirror_service.task_definition.add_volume(
+            name="mirror-efs",
+            efs_volume_configuration=ecs.EfsVolumeConfiguration(
+                file_system_id=file_system.file_system_id,
+                authorization_config=ecs.AuthorizationConfig(
+                    access_point_id=access_point.access_point_id
+                ),
+                transit_encryption="ENABLED",
+            ),
+        )
+
+        self.mirror_service.task_definition.default_container.add_mount_points(
+            ecs.MountPoint(
+                container_path="/nexus-data",
+                read_only=False,
+                source_volume="mirror-efs",
+            )
+        )
+
+        self.mirror_service.target_group.configure_health_check(
+            path="/service/rest/v1/status"
+        )
+
+        file_system.connections.allow_default_port_from(self.mirror_service.service)
+
+        # ECR caches images from these registries on first pull
+        cdk.CfnResource(
+            self,
+            "ecr-public-cache-rule",
+            type="AWS::ECR::PullThroughCacheRule",
+            properties={
+                "EcrRepositoryPrefix": "ecr-public",
+                "UpstreamRegistryUrl": "public.ecr.aws",
+            },
+        )
+
+        if props.get("docker_hub_credential_arn"):
+            # Docker Hub needs a Secrets Manager secret named `ecr-pullthroughcache/...`
+            cdk.CfnResource(
+                self,
+                "docker-hub-cache-rule",
+                type="AWS::ECR::PullThroughCacheRule",
+                properties={
+                    "EcrRepositoryPrefix": "docker-hub",
+                    "UpstreamRegistryUrl": "registry-1.docker.io",
+                    "CredentialArn": props["docker_hub_credential_arn"],
+                },
+            )
+
+        url = f"http://{alb.load_balancer_dns_name}"
+
+        # Environment for agents, pointing package managers at the mirror
+        self.agent_environment = {
+            "MAVEN_MIRROR_URL": f"{url}/repository/maven-public/",
+            "NPM_CONFIG_REGISTRY": f"{url}/repository/npm-proxy/",
+            "PIP_INDEX_URL": f"{url}/repository/pypi-proxy/simple",
+            "PIP_TRUSTED_HOST": alb.load_balancer_dns_name,
+        }
+
+        cdk.CfnOutput(self, "MirrorUrl", value=url)
+        cdk.CfnOutput(self, "MirrorAdminPasswordSecret", value=admin_password.secret_arn)
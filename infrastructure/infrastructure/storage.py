@@ -0,0 +1,60 @@
+from aws_cdk import core as cdk, aws_efs as efs
+
+EFS_PROFILES = ["bursting", "provisioned", "elastic"]
+EFS_PERFORMANCE_MODES = {
+    "general_purpose": efs.PerformanceMode.GENERAL_PURPOSE,
+    "max_io": efs.PerformanceMode.MAX_IO,
+}
+EFS_IA_DAYS = [7, 14, 30, 60, 90]
+
+# Task storage for controller workspaces. It sits outside jenkins_home, because the
+# base image declares jenkins_home a volume and build steps can't prepare paths in it.
+WORKSPACES_DIR = "/var/jenkins_workspace"
+
+
+def file_system_options(props) -> dict:
+    """Keyword arguments for `efs.FileSystem` from the `efs_*` stack props."""
+    profile = props.get("efs_profile", "bursting")
+    if profile not in EFS_PROFILES:
+        raise ValueError(f"efs_profile must be one of {EFS_PROFILES}, got '{profile}'")
+
+    performance_mode = props.get("efs_performance_mode", "general_purpose")
+    if performance_mode not in EFS_PERFORMANCE_MODES:
+        raise ValueError(
+            f"efs_performance_mode must be one of {list(EFS_PERFORMANCE_MODES)}, got '{performance_mode}'"
+        )
+    if profile == "elastic" and performance_mode != "general_purpose":
+        raise ValueError("Elastic throughput requires the general_purpose performance mode")
+
+    options = {"performance_mode": EFS_PERFORMANCE_MODES[performance_mode]}
+
+    if profile == "provisioned":
+        options["throughput_mode"] = efs.ThroughputMode.PROVISIONED
+        options["provisioned_throughput_per_second"] = cdk.Size.mebibytes(
+            props.get("efs_provisioned_mibps", 64)
+        )
+    else:
+        options["throughput_mode"] = efs.ThroughputMode.BURSTING
+
+    return options
+
+
+def configure_file_system(file_system: efs.FileSystem, props):
+    """Applies the settings `efs.FileSystem` has no properties for."""
+    cfn_file_system = file_system.node.default_child
+
+    if props.get("efs_profile") == "elastic":
+        cfn_file_system.add_property_override("ThroughputMode", "elastic")
+
+    # Old build records and artifacts move to Infrequent Access and come back on first read
+    ia_after_days = props.get("efs_ia_after_days")
+    if ia_after_days:
+        if ia_after_days not in EFS_IA_DAYS:
+            raise ValueError(f"efs_ia_after_days must be one of {EFS_IA_DAYS}")
+        cfn_file_system.add_property_override(
+            "LifecyclePolicies",
+            [
+                {"TransitionToIA": f"AFTER_{ia_after_days}_DAYS"},
+                {"TransitionToPrimaryStorageClass": "AFTER_1_ACCESS"},
+            ],
+        )
@@ -0,0 +1,123 @@
+import json
+import weakref
+
+from aws_cdk import core as cdk, aws_ec2 as ec2, aws_iam as iam
+
+# Every construct and value object is a round trip to the jsii runtime at synth
+# time. These helpers create shared subnets, ports, security group rules and
+# policy statements once per stack, however many resources use them.
+
+# Caches live as long as their stack, so stacks synthesized in one process
+# (tests, benchmarks) never share constructs or values.
+_caches = weakref.WeakKeyDictionary()
+
+
+def memoize(stack: cdk.Stack, key, factory):
+    """Returns `factory()`, called only the first time `key` is used in `stack`."""
+    cache = _caches.setdefault(stack, {})
+    if key not in cache:
+        cache[key] = factory()
+    return cache[key]
+
+
+def subnets(stack: cdk.Stack, *subnet_ids: str) -> ec2.SubnetSelection:
+    """Selection of imported subnets; each subnet is imported once per stack."""
+
+    def select():
+        return ec2.SubnetSelection(
+            subnets=[
+                memoize(
+                    stack,
+                    ("subnet", subnet_id),
+                    lambda: ec2.Subnet.from_subnet_id(
+                        stack, f"subnet-{subnet_id}", subnet_id
+                    ),
+                )
+                for subnet_id in subnet_ids
+            ]
+        )
+
+    return memoize(stack, ("subnets",) + subnet_ids, select)
+
+
+def subnet_cidrs(stack: cdk.Stack, vpc: ec2.IVpc, *subnet_ids: str) -> list:
+    """CIDR blocks of the looked up `vpc`'s subnets with these IDs.
+
+    Subnets missing from the lookup are reported as synth errors, since the
+    dummy VPC of a pending lookup has none of them.
+    """
+    cidrs = {
+        subnet.subnet_id: subnet.ipv4_cidr_block
+        for subnet in vpc.public_subnets + vpc.private_subnets + vpc.isolated_subnets
+        if subnet.subnet_id in subnet_ids
+    }
+    missing = [subnet_id for subnet_id in subnet_ids if subnet_id not in cidrs]
+    if missing:
+        cdk.Annotations.of(stack).add_error(
+            f"Subnets {', '.join(missing)} are not in the looked up VPC {vpc.vpc_id}"
+        )
+    return [cidrs[subnet_id] for subnet_id in subnet_ids if subnet_id in cidrs]
+
+
+def tcp(stack: cdk.Stack, port: int, label: str = None) -> ec2.Port:
+    """A TCP port, once per stack. The `label` names the rules built from it and their logical IDs."""
+
+    def port_range():
+        if label is None:
+            return ec2.Port.tcp(port)
+        return ec2.Port(
+            protocol=ec2.Protocol.TCP,
+            string_representation=label,
+            from_port=port,
+            to_port=port,
+        )
+
+    return memoize(stack, ("tcp", port, label), port_range)
+
+
+def allow_from(
+    stack: cdk.Stack,
+    target: ec2.IConnectable,
+    other: ec2.IConnectable,
+    port: ec2.Port = None,
+    description: str = None,
+):
+    """`target.connections.allow_from(other, port)`, once per stack; `port` defaults to the default port."""
+
+    def allow():
+        if port is None:
+            target.connections.allow_default_port_from(other, description)
+        else:
+            target.connections.allow_from(other, port, description)
+        return True
+
+    memoize(stack, ("allow", target, other, port), allow)
+
+
+def policy_statements(*statements: dict) -> list:
+    """Allow statements from `{"actions", "resources", "conditions"}` dicts.
+
+    Statements with the same resources and conditions are merged into one, and
+    actions repeated across them are listed once.
+    """
+    merged = {}
+    for statement in statements:
+        conditions = statement.get("conditions")
+        key = (
+            tuple(sorted(statement["resources"])),
+            json.dumps(conditions, sort_keys=True),
+        )
+        entry = merged.setdefault(
+            key,
+            {"actions": [], "resources": statement["resources"], "conditions": conditions},
+        )
+        entry["actions"] += [a for a in statement["actions"] if a not in entry["actions"]]
+
+    return [
+        iam.PolicyStatement(
+            actions=entry["actions"],
+            resources=entry["resources"],
+            conditions=entry["conditions"],
+        )
+        for entry in merged.values()
+    ]
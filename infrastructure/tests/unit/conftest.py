@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+
+import pytest
+from aws_cdk import core as cdk
+
+from infrastructure.infrastructure_stack import InfrastructureStack
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# Inputs the committed lookup snapshot was captured for
+ENVIRONMENT = cdk.Environment(account="420058945283", region="us-east-1")
+VPC_ID = "vpc-0d13a9949cc7ebb5c"
+
+# The controller image's CasC scripts are tested from its build context
+CONTROLLER_IMAGE = os.path.join(APP_DIR, "docker", "jenkins-controller")
+CASC_TEMPLATE_FILE = os.path.join(CONTROLLER_IMAGE, "jenkins.j2")
+sys.path.insert(0, CONTROLLER_IMAGE)
+
+# Enough for modify_casc.py to render a valid configuration
+CASC_ENVIRONMENT = {
+    "cluster_arn": "arn:aws:ecs:us-east-1:123456789012:cluster/test",
+    "aws_region": "us-east-1",
+    "jenkins_url": "http://jenkins.internal:8080/",
+    "subnet_ids": "subnet-1,subnet-2",
+    "security_group_ids": "sg-1",
+    "execution_role_arn": "arn:aws:iam::123456789012:role/execution",
+    "task_role_arn": "arn:aws:iam::123456789012:role/task",
+    "agent_image": "123456789012.dkr.ecr.us-east-1.amazonaws.com/agent:latest",
+    "worker_log_group": "agents",
+    "worker_log_stream_prefix": "agent",
+}
+
+PROPS = {
+    "alb_subnet_1": "subnet-08788b393eac4a871",
+    "alb_subnet_2": "subnet-0491589152201530a",
+    "jenkins_subnet_1": "subnet-0865a0e75c3fd9f02",
+    "jenkins_subnet_2": "subnet-0cb3f35899a541210",
+    "vpn_client_cidr": "10.20.0.0/16",
+    "admin_password": "test",
+}
+
+
+@pytest.fixture
+def synth(monkeypatch, tmp_path):
+    """Synthesizes a stack on the shared cluster offline, with `PROPS` and the given overrides."""
+    # Docker assets are staged relative to the app directory
+    monkeypatch.chdir(APP_DIR)
+
+    with open(os.path.join(APP_DIR, "lookups.snapshot.json")) as f:
+        context = json.load(f)["context"]
+    with open(os.path.join(APP_DIR, "cdk.json")) as f:
+        context.update(json.load(f).get("context", {}))
+
+    def synth_stack(stack_class, **props) -> dict:
+        app = cdk.App(context=context, outdir=str(tmp_path / "cdk.out"))
+        infrastructure = InfrastructureStack(app, "infrastructure", VPC_ID, env=ENVIRONMENT)
+        stack_class(app, "stack", infrastructure.cluster, {**PROPS, **props}, env=ENVIRONMENT)
+        return app.synth().get_stack_by_name("stack").template
+
+    return synth_stack
+
+
+def resources(template: dict, resource_type: str) -> list:
+    """Properties of every resource of `resource_type` in `template`."""
+    return [
+        resource.get("Properties", {})
+        for resource in template["Resources"].values()
+        if resource["Type"] == resource_type
+    ]
@@ -0,0 +1,122 @@
+import json
+
+import casc_watcher
+import modify_casc
+import pytest
+
+from .conftest import CASC_ENVIRONMENT, CASC_TEMPLATE_FILE
+
+
+class StopWatching(BaseException):
+    """Ends `watch`, which keeps polling through any `Exception`."""
+
+
+class StubSsm:
+    """SSM client returning one parameter version per poll, then stopping the watcher."""
+
+    def __init__(self, *versions):
+        self.versions = list(versions)
+
+    def get_parameter(self, Name):
+        if not self.versions:
+            raise StopWatching()
+        version, settings = self.versions.pop(0)
+        value = settings if isinstance(settings, str) else json.dumps(settings)
+        return {"Parameter": {"Name": Name, "Version": version, "Value": value}}
+
+
+@pytest.fixture
+def controller(tmp_path, monkeypatch):
+    """Renders into a temporary `/jenkins.yaml` and records reload requests."""
+    config_file = tmp_path / "jenkins.yaml"
+    render, write_if_changed = modify_casc.render, modify_casc.write_if_changed
+    monkeypatch.setattr(modify_casc, "render", lambda env: render(env, CASC_TEMPLATE_FILE))
+    monkeypatch.setattr(
+        modify_casc,
+        "write_if_changed",
+        lambda content: write_if_changed(content, str(config_file)),
+    )
+
+    reloads = []
+    monkeypatch.setattr(modify_casc, "reload_configuration", lambda: reloads.append(True))
+    monkeypatch.setattr(casc_watcher.time, "sleep", lambda seconds: None)
+    for name in CASC_ENVIRONMENT:
+        monkeypatch.delenv(name, raising=False)
+
+    controller = type("Controller", (), {})()
+    controller.config_file = config_file
+    controller.reloads = reloads
+    return controller
+
+
+def watch(client, version=1):
+    with pytest.raises(StopWatching):
+        casc_watcher.watch(client, "casc-settings", version, 30)
+
+
+def test_new_version_is_applied_and_reloaded(controller):
+    casc_watcher.apply_settings(CASC_ENVIRONMENT)
+
+    watch(
+        StubSsm(
+            (1, CASC_ENVIRONMENT),
+            (2, dict(CASC_ENVIRONMENT, agent_pool_max_agents="80")),
+            (2, dict(CASC_ENVIRONMENT, agent_pool_max_agents="80")),
+        )
+    )
+
+    assert "maxAgents: 80" in controller.config_file.read_text()
+    assert len(controller.reloads) == 1
+
+
+def test_unchanged_version_is_not_rendered(controller):
+    watch(StubSsm((1, dict(CASC_ENVIRONMENT, agent_pool_max_agents="80"))))
+
+    assert not controller.config_file.exists()
+    assert controller.reloads == []
+
+
+def test_new_version_with_same_rendering_is_not_reloaded(controller):
+    casc_watcher.apply_settings(CASC_ENVIRONMENT)
+
+    watch(StubSsm((2, CASC_ENVIRONMENT)))
+
+    assert controller.reloads == []
+
+
+def test_invalid_version_keeps_the_last_configuration(controller):
+    casc_watcher.apply_settings(CASC_ENVIRONMENT)
+    applied = controller.config_file.read_text()
+
+    watch(
+        StubSsm(
+            (2, dict(CASC_ENVIRONMENT, cluster_arn="")),
+            (3, "{not json"),
+            (4, dict(CASC_ENVIRONMENT, agent_pool_max_agents="80")),
+        )
+    )
+
+    assert "maxAgents: 80" in controller.config_file.read_text()
+    assert applied != controller.config_file.read_text()
+    assert len(controller.reloads) == 1
+
+
+def test_failed_reload_is_retried(controller, monkeypatch):
+    attempts = []
+
+    def reload_configuration():
+        attempts.append(True)
+        if len(attempts) == 1:
+            raise ConnectionError("Jenkins is restarting")
+
+    monkeypatch.setattr(modify_casc, "reload_configuration", reload_configuration)
+
+    watch(
+        StubSsm(
+            (2, dict(CASC_ENVIRONMENT, agent_pool_max_agents="80")),
+            (2, dict(CASC_ENVIRONMENT, agent_pool_max_agents="80")),
+            (2, dict(CASC_ENVIRONMENT, agent_pool_max_agents="80")),
+        )
+    )
+
+    assert len(attempts) == 2
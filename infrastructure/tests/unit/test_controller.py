@@ -0,0 +1,113 @@
+import pytest
+
+from infrastructure.controller import controller_home_path, controller_profile
+from infrastructure.jenkins_stack import JenkinsStack
+
+from .conftest import resources
+
+TEAMS = [{"name": "web"}, {"name": "data", "host": "data.example.com"}]
+
+
+def test_each_controller_has_its_own_home(synth):
+    template = synth(JenkinsStack, teams=TEAMS)
+
+    paths = sorted(
+        access_point["RootDirectory"]["Path"]
+        for access_point in resources(template, "AWS::EFS::AccessPoint")
+    )
+    assert paths == ["/default", "/teams/data", "/teams/web"]
+
+
+@pytest.mark.parametrize("path", ["/", "/teams", "/teams/"])
+def test_home_cannot_contain_team_homes(path):
+    with pytest.raises(ValueError):
+        controller_home_path({"controller_home_path": path, "teams": TEAMS})
+
+
+def test_root_home_without_teams():
+    assert controller_home_path({}) == "/"
+    assert controller_home_path({"teams": []}) == "/"
+    assert controller_home_path({"controller_home_path": "/"}) == "/"
+
+
+def test_default_home_with_teams():
+    assert controller_home_path({"teams": TEAMS}) == "/default"
+    assert controller_home_path({"controller_home_path": "/main", "teams": TEAMS}) == "/main"
+
+
+def test_root_access_point_without_teams(synth):
+    (access_point,) = resources(synth(JenkinsStack), "AWS::EFS::AccessPoint")
+
+    assert access_point["RootDirectory"]["Path"] == "/"
+
+
+def test_path_prefixed_team_reloads_under_its_prefix(synth):
+    template = synth(JenkinsStack, teams=TEAMS)
+
+    environments = {}
+    for task_definition in resources(template, "AWS::ECS::TaskDefinition"):
+        for container in task_definition["ContainerDefinitions"]:
+            environment = {e["Name"]: e["Value"] for e in container.get("Environment", [])}
+            if "cloud_name" in environment:
+                environments[environment["cloud_name"]] = environment
+
+    assert environments["fargate-agents-web"]["JENKINS_PREFIX"] == "/web"
+    assert environments["fargate-agents-web"]["JENKINS_OPTS"] == "--prefix=/web"
+    assert "JENKINS_PREFIX" not in environments["fargate-agents-data"]
+
+
+def controller_task_definitions(template: dict) -> dict:
+    """Task definitions by the cloud name of their controller."""
+    task_definitions = {}
+    for task_definition in resources(template, "AWS::ECS::TaskDefinition"):
+        for container in task_definition["ContainerDefinitions"]:
+            environment = {e["Name"]: e["Value"] for e in container.get("Environment", [])}
+            if container["Name"] == "jenkins-controller":
+                task_definitions[environment.get("cloud_name", "default")] = (
+                    task_definition,
+                    environment,
+                )
+    return task_definitions
+
+
+def test_profiles_size_the_controllers(synth):
+    template = synth(
+        JenkinsStack, controller_profile="medium", teams=[{"name": "web", "profile": "large"}]
+    )
+
+    sizes = {
+        name: (task_definition["Cpu"], task_definition["Memory"])
+        for name, (task_definition, _) in controller_task_definitions(template).items()
+    }
+    assert sizes == {"default": ("2048", "4096"), "fargate-agents-web": ("4096", "8192")}
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        controller_profile("huge")
+
+
+def test_heap_follows_the_container_below_the_memory_alarm(synth):
+    ((_, environment),) = controller_task_definitions(synth(JenkinsStack)).values()
+    java_opts = environment["JAVA_OPTS"].split()
+
+    assert "-XX:+UseG1GC" in java_opts
+    assert "-XX:+AlwaysPreTouch" not in java_opts
+    assert "-Xloggc:/var/jenkins_home/gc-%t.log" in java_opts
+    (max_heap,) = [opt for opt in java_opts if opt.startswith("-XX:MaxRAMPercentage=")]
+    assert float(max_heap.split("=")[1]) <= 65
+
+
+def test_pressure_alarms(synth):
+    template = synth(JenkinsStack, controller_cpu_alarm_percent=70)
+
+    alarms = {
+        alarm["MetricName"]: alarm
+        for alarm in resources(template, "AWS::CloudWatch::Alarm")
+        if alarm.get("Namespace") == "AWS/ECS"
+    }
+    assert alarms["CPUUtilization"]["Threshold"] == 70
+    assert alarms["MemoryUtilization"]["Threshold"] == 85
+    for alarm in alarms.values():
+        assert alarm["ComparisonOperator"] == "GreaterThanOrEqualToThreshold"
+        assert alarm["EvaluationPeriods"] == 3
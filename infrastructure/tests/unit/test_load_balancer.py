@@ -0,0 +1,210 @@
+import pytest
+
+from infrastructure.jenkins_stack import JenkinsStack
+from infrastructure.load_balancer import health_check_options
+
+from .conftest import resources
+
+TEAMS = [{"name": "web"}, {"name": "data", "host": "data.example.com"}]
+
+
+def attributes(properties: dict, key: str) -> dict:
+    return {attribute["Key"]: attribute["Value"] for attribute in properties.get(key, [])}
+
+
+def application_load_balancer(template: dict) -> dict:
+    (properties,) = [
+        properties
+        for properties in resources(template, "AWS::ElasticLoadBalancingV2::LoadBalancer")
+        if properties["Type"] == "application"
+    ]
+    return attributes(properties, "LoadBalancerAttributes")
+
+
+def controller_target_groups(template: dict) -> list:
+    return [
+        properties
+        for properties in resources(template, "AWS::ElasticLoadBalancingV2::TargetGroup")
+        if properties["Protocol"] == "HTTP"
+    ]
+
+
+def network_load_balancer(template: dict) -> str:
+    """Logical ID of the agent load balancer."""
+    (logical_id,) = [
+        logical_id
+        for logical_id, resource in template["Resources"].items()
+        if resource["Type"] == "AWS::ElasticLoadBalancingV2::LoadBalancer"
+        and resource["Properties"]["Type"] == "network"
+    ]
+    return logical_id
+
+
+def controller_environments(template: dict) -> dict:
+    """Controller environments by cloud name; the default controller has none."""
+    environments = {}
+    for task_definition in resources(template, "AWS::ECS::TaskDefinition"):
+        for container in task_definition["ContainerDefinitions"]:
+            if container["Name"] == "jenkins-controller":
+                environment = {e["Name"]: e["Value"] for e in container["Environment"]}
+                environments[environment.get("cloud_name")] = environment
+    return environments
+
+
+def test_agent_listeners(synth):
+    template = synth(JenkinsStack, teams=TEAMS)
+    nlb = network_load_balancer(template)
+
+    ports = sorted(
+        listener["Port"]
+        for listener in resources(template, "AWS::ElasticLoadBalancingV2::Listener")
+        if listener["LoadBalancerArn"] == {"Ref": nlb}
+    )
+    # Each team is offset by its priority
+    assert ports == [8080, 8081, 8082, 50000, 50001, 50002]
+
+    target_ports = sorted(
+        target_group["Port"]
+        for target_group in resources(template, "AWS::ElasticLoadBalancingV2::TargetGroup")
+        if target_group["Protocol"] == "TCP"
+    )
+    assert target_ports == [8080, 8080, 8080, 50000, 50000, 50000]
+
+
+def test_agents_reach_controllers_through_the_load_balancer(synth):
+    template = synth(JenkinsStack, teams=TEAMS)
+    dns_name = {"Fn::GetAtt": [network_load_balancer(template), "DNSName"]}
+
+    environments = controller_environments(template)
+    assert environments[None]["jenkins_url"] == {
+        "Fn::Join": ["", ["http://", dns_name, ":8080/"]]
+    }
+    assert environments[None]["agent_tunnel"] == {
+        "Fn::Join": ["", [dns_name, ":50000"]]
+    }
+    assert environments["fargate-agents-web"]["jenkins_url"] == {
+        "Fn::Join": ["", ["http://", dns_name, ":8081/web/"]]
+    }
+    assert environments["fargate-agents-web"]["agent_tunnel"] == {
+        "Fn::Join": ["", [dns_name, ":50001"]]
+    }
+    assert environments["fargate-agents-data"]["jenkins_url"] == {
+        "Fn::Join": ["", ["http://", dns_name, ":8082/"]]
+    }
+    assert environments["fargate-agents-data"]["agent_tunnel"] == {
+        "Fn::Join": ["", [dns_name, ":50002"]]
+    }
+
+
+def test_agent_ingress_from_the_jenkins_subnets_only(synth):
+    ingress = [
+        (rule["CidrIp"], rule["FromPort"], rule["ToPort"])
+        for group in resources(synth(JenkinsStack), "AWS::EC2::SecurityGroup")
+        for rule in group.get("SecurityGroupIngress", [])
+        if rule.get("Description") == "Allow agent traffic through the agent load balancer"
+    ]
+
+    # The CIDRs of jenkins_subnet_1 and jenkins_subnet_2 in the lookup snapshot
+    assert sorted(ingress) == [
+        ("10.1.3.0/24", 8080, 8080),
+        ("10.1.3.0/24", 50000, 50000),
+        ("10.1.4.0/24", 8080, 8080),
+        ("10.1.4.0/24", 50000, 50000),
+    ]
+
+
+def test_no_agent_load_balancer_with_the_alb_endpoint(synth):
+    template = synth(JenkinsStack, agent_endpoint="alb")
+
+    load_balancers = resources(template, "AWS::ElasticLoadBalancingV2::LoadBalancer")
+    assert [properties["Type"] for properties in load_balancers] == ["application"]
+    assert "agent_tunnel" not in controller_environments(template)[None]
+
+
+def test_idle_timeout(synth):
+    template = synth(JenkinsStack)
+    assert application_load_balancer(template)["idle_timeout.timeout_seconds"] == "300"
+
+    template = synth(JenkinsStack, alb_idle_timeout_seconds=900)
+    assert application_load_balancer(template)["idle_timeout.timeout_seconds"] == "900"
+
+
+def test_http2(synth):
+    assert "routing.http2.enabled" not in application_load_balancer(synth(JenkinsStack))
+
+    template = synth(JenkinsStack, alb_http2_enabled=False)
+    assert application_load_balancer(template)["routing.http2.enabled"] == "false"
+
+
+def test_health_check_defaults(synth):
+    (target_group,) = controller_target_groups(synth(JenkinsStack))
+
+    assert target_group["HealthCheckPath"] == "/whoAmI/api/json"
+    assert target_group["HealthCheckIntervalSeconds"] == 15
+    assert target_group["HealthCheckTimeoutSeconds"] == 5
+    assert target_group["HealthyThresholdCount"] == 2
+    assert target_group["UnhealthyThresholdCount"] == 3
+    assert target_group["Matcher"] == {"HttpCode": "200"}
+
+
+def test_health_check_settings(synth):
+    template = synth(
+        JenkinsStack,
+        alb_health_check_path="/login",
+        alb_health_check_interval_seconds=30,
+        alb_health_check_timeout_seconds=10,
+        alb_healthy_threshold=3,
+        alb_unhealthy_threshold=5,
+    )
+    (target_group,) = controller_target_groups(template)
+
+    assert target_group["HealthCheckPath"] == "/login"
+    assert target_group["HealthCheckIntervalSeconds"] == 30
+    assert target_group["HealthCheckTimeoutSeconds"] == 10
+    assert target_group["HealthyThresholdCount"] == 3
+    assert target_group["UnhealthyThresholdCount"] == 5
+
+
+def test_path_prefixed_team_health_check(synth):
+    template = synth(JenkinsStack, teams=[{"name": "web"}])
+
+    paths = sorted(
+        target_group["HealthCheckPath"] for target_group in controller_target_groups(template)
+    )
+    assert paths == ["/web/whoAmI/api/json", "/whoAmI/api/json"]
+
+
+def test_deregistration_delay(synth):
+    template = synth(JenkinsStack, alb_deregistration_delay_seconds=10)
+
+    target_groups = resources(template, "AWS::ElasticLoadBalancingV2::TargetGroup")
+    # The controller target group and the agent listeners on the network load balancer
+    assert len(target_groups) == 3
+    for target_group in target_groups:
+        delay = attributes(target_group, "TargetGroupAttributes")
+        assert delay["deregistration_delay.timeout_seconds"] == "10"
+
+
+def test_stickiness(synth):
+    (target_group,) = controller_target_groups(synth(JenkinsStack))
+    assert "stickiness.enabled" not in attributes(target_group, "TargetGroupAttributes")
+
+    (target_group,) = controller_target_groups(synth(JenkinsStack, alb_stickiness_minutes=10))
+    stickiness = attributes(target_group, "TargetGroupAttributes")
+    assert stickiness["stickiness.enabled"] == "true"
+    assert stickiness["stickiness.type"] == "lb_cookie"
+    assert stickiness["stickiness.lb_cookie.duration_seconds"] == "600"
+
+
+@pytest.mark.parametrize(
+    "props",
+    [
+        {"alb_health_check_interval_seconds": 4},
+        {"alb_health_check_interval_seconds": 301},
+        {"alb_health_check_timeout_seconds": 1},
+        {"alb_health_check_interval_seconds": 10, "alb_health_check_timeout_seconds": 10},
+    ],
+)
+def test_invalid_health_check(props):
+    with pytest.raises(ValueError):
+        health_check_options(props)
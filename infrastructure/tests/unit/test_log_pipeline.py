@@ -0,0 +1,81 @@
+import pytest
+
+from infrastructure.jenkins_stack import JenkinsStack
+from infrastructure.log_pipeline import agent_log_mode, log_retention
+
+from .conftest import resources
+
+BUCKET_ARN = {"Fn::GetAtt": ["AgentLogArchiveBucketA5A90389", "Arn"]}
+
+
+def archive_bucket(template: dict) -> list:
+    """Properties of the archive bucket, if the stack has one."""
+    return [
+        resource["Properties"]
+        for logical_id, resource in template["Resources"].items()
+        if logical_id.startswith("AgentLogArchiveBucket") and resource["Type"] == "AWS::S3::Bucket"
+    ]
+
+
+def test_no_archive_by_default(synth):
+    template = synth(JenkinsStack)
+
+    assert archive_bucket(template) == []
+    assert resources(template, "AWS::KinesisFirehose::DeliveryStream") == []
+    assert resources(template, "AWS::Logs::SubscriptionFilter") == []
+
+
+def test_archive(synth):
+    template = synth(
+        JenkinsStack, agent_log_archive=True, agent_log_archive_expiration_days=400
+    )
+
+    (bucket,) = archive_bucket(template)
+    (rule,) = bucket["LifecycleConfiguration"]["Rules"]
+    assert rule["ExpirationInDays"] == 400
+    assert [t["StorageClass"] for t in rule["Transitions"]] == ["STANDARD_IA", "GLACIER"]
+
+    (stream,) = resources(template, "AWS::KinesisFirehose::DeliveryStream")
+    destination = stream["ExtendedS3DestinationConfiguration"]
+    assert destination["BucketARN"] == BUCKET_ARN
+    assert destination["Prefix"] == "agents/"
+    assert destination["CompressionFormat"] == "UNCOMPRESSED"
+
+    (subscription,) = resources(template, "AWS::Logs::SubscriptionFilter")
+    assert subscription["LogGroupName"] == {"Ref": "AgentLogGroupFDA72973"}
+    assert subscription["FilterPattern"] == ""
+
+
+def test_delivery_role_can_check_the_bucket(synth):
+    template = synth(JenkinsStack, agent_log_archive=True)
+
+    (policy,) = [
+        policy
+        for policy in resources(template, "AWS::IAM::Policy")
+        if policy["Roles"] == [{"Ref": "AgentLogArchiveDeliveryRole9B855DC6"}]
+    ]
+    (statement,) = policy["PolicyDocument"]["Statement"]
+    assert statement["Action"] == [
+        "s3:AbortMultipartUpload",
+        "s3:GetBucketLocation",
+        "s3:GetObject",
+        "s3:ListBucket",
+        "s3:ListBucketMultipartUploads",
+        "s3:PutObject",
+    ]
+    assert statement["Resource"] == [
+        BUCKET_ARN,
+        {"Fn::Join": ["", [BUCKET_ARN, "/*"]]},
+    ]
+
+
+def test_archive_outlives_the_glacier_transition(synth):
+    with pytest.raises(ValueError):
+        synth(JenkinsStack, agent_log_archive=True, agent_log_archive_expiration_days=90)
+
+
+def test_invalid_log_settings():
+    with pytest.raises(ValueError):
+        log_retention(10)
+    with pytest.raises(ValueError):
+        agent_log_mode({"agent_log_mode": "async"})
@@ -0,0 +1,26 @@
+from infrastructure.mirror_stack import MirrorStack
+
+from .conftest import resources
+
+
+def test_load_balancer_only_reachable_from_the_vpc(synth):
+    template = synth(MirrorStack)
+
+    rules = [
+        rule
+        for group in resources(template, "AWS::EC2::SecurityGroup")
+        for rule in group.get("SecurityGroupIngress", [])
+    ]
+    assert [rule["CidrIp"] for rule in rules] == ["10.1.0.0/16"]
+
+
+def test_proxy_repositories_are_provisioned(synth):
+    template = synth(MirrorStack)
+
+    (task_definition,) = resources(template, "AWS::ECS::TaskDefinition")
+    containers = {c["Name"]: c for c in task_definition["ContainerDefinitions"]}
+
+    init = containers["nexus-init"]
+    assert init["Essential"] is False
+    assert init["DependsOn"] == [{"Condition": "START", "ContainerName": "nexus"}]
+    assert [secret["Name"] for secret in init["Secrets"]] == ["NEXUS_ADMIN_PASSWORD"]
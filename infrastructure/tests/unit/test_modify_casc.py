@@ -0,0 +1,165 @@
+import json
+
+import modify_casc
+import pytest
+
+from .conftest import CASC_ENVIRONMENT as ENVIRONMENT, CASC_TEMPLATE_FILE as TEMPLATE_FILE
+
+SPOT = [{"provider": "FARGATE_SPOT", "weight": 1, "base": 0}]
+
+
+def render(**environment) -> dict:
+    content = modify_casc.render({**ENVIRONMENT, **environment}, TEMPLATE_FILE)
+    return modify_casc.validate(content)
+
+
+def templates(config: dict) -> dict:
+    (cloud,) = config["jenkins"]["clouds"]
+    return {template["templateName"]: template for template in cloud["ecs"]["templates"]}
+
+
+def test_spot_templates_have_no_launch_type():
+    agent_templates = [
+        {"name": "small", "label": "small", "cpu": 512, "memory": 1024, "capacity_providers": []},
+        {"name": "spot", "label": "spot", "cpu": 512, "memory": 1024, "capacity_providers": SPOT},
+    ]
+
+    rendered = templates(render(agent_templates=json.dumps(agent_templates)))
+
+    assert rendered["fargate-agent-small"]["launchType"] == "FARGATE"
+    assert "capacityProviderStrategies" not in rendered["fargate-agent-small"]
+    assert "launchType" not in rendered["fargate-agent-spot"]
+    assert rendered["fargate-agent-spot"]["capacityProviderStrategies"] == [
+        {"provider": "FARGATE_SPOT", "weight": 1, "base": 0}
+    ]
+
+
+def test_launch_type_and_strategy_are_exclusive():
+    content = modify_casc.render(ENVIRONMENT, TEMPLATE_FILE).replace(
+        "launchType: FARGATE",
+        "launchType: FARGATE\n            capacityProviderStrategies: []",
+    )
+
+    with pytest.raises(modify_casc.ConfigurationError, match="either launchType"):
+        modify_casc.validate(content)
+
+
+def test_agent_environment_values_are_quoted():
+    agent_environment = {
+        "QUOTED": 'say "hi"',
+        "WINDOWS_PATH": "C:\\tools\\bin",
+        "COMMENT": "a: b # c",
+        "MARKUP": "<none> & more",
+        "NUMBER": "007",
+    }
+
+    rendered = templates(render(agent_environment=json.dumps(agent_environment)))
+
+    environments = rendered["fargate-agent-nodes"]["environments"]
+    assert {e["name"]: e["value"] for e in environments if e["name"] in agent_environment} == (
+        agent_environment
+    )
+
+
+def test_missing_required_variables():
+    environment = dict(ENVIRONMENT, cluster_arn="")
+    del environment["aws_region"]
+
+    with pytest.raises(modify_casc.ConfigurationError) as error:
+        modify_casc.variables(environment)
+    assert str(error.value) == "Missing environment variables: aws_region, cluster_arn"
+
+
+def test_invalid_json_variable():
+    environment = dict(ENVIRONMENT, agent_environment="{")
+
+    with pytest.raises(modify_casc.ConfigurationError, match="agent_environment is not valid JSON"):
+        modify_casc.variables(environment)
+
+
+def test_default_agent_template():
+    templates = modify_casc.variables(ENVIRONMENT)["AGENT_TEMPLATES"]
+
+    assert templates == modify_casc.DEFAULT_AGENT_TEMPLATES
+
+
+def test_schema_violation():
+    content = modify_casc.render(ENVIRONMENT, TEMPLATE_FILE).replace(
+        "maxAgents: 50", "maxAgents: many"
+    )
+
+    with pytest.raises(modify_casc.ConfigurationError) as error:
+        modify_casc.validate(content)
+    assert "$.jenkins.clouds[0].ecs.maxAgents: expected a non-empty int" in str(error.value)
+
+
+def test_invalid_yaml():
+    with pytest.raises(modify_casc.ConfigurationError, match="not valid YAML"):
+        modify_casc.validate("jenkins: [")
+
+
+def test_unchanged_render_skips_the_write(tmp_path):
+    config_file = tmp_path / "jenkins.yaml"
+    content = modify_casc.render(ENVIRONMENT, TEMPLATE_FILE)
+
+    assert modify_casc.write_if_changed(content, str(config_file))
+    written = config_file.stat().st_mtime_ns
+    assert not modify_casc.write_if_changed(content, str(config_file))
+    assert config_file.stat().st_mtime_ns == written
+
+    assert modify_casc.write_if_changed(content + "# changed\n", str(config_file))
+    assert config_file.read_text().endswith("# changed\n")
+
+
+class Response:
+    status = 200
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    sent = []
+
+    def urlopen(request, timeout):
+        sent.append(request)
+        return Response()
+
+    monkeypatch.setattr(modify_casc.request, "urlopen", urlopen)
+    monkeypatch.delenv("JENKINS_LOCAL_URL", raising=False)
+    monkeypatch.setenv("CASC_RELOAD_TOKEN", "secret")
+    return sent
+
+
+def test_reload_url(requests, monkeypatch):
+    monkeypatch.delenv("JENKINS_PREFIX", raising=False)
+
+    assert modify_casc.reload_configuration() == 200
+    (sent,) = requests
+    assert sent.get_method() == "POST"
+    assert sent.full_url == (
+        "http://localhost:8080/reload-configuration-as-code/?casc-reload-token=secret"
+    )
+
+
+def test_prefixed_reload_url(requests, monkeypatch):
+    monkeypatch.setenv("JENKINS_PREFIX", "/web")
+
+    modify_casc.reload_configuration()
+
+    (sent,) = requests
+    assert sent.full_url == (
+        "http://localhost:8080/web/reload-configuration-as-code/?casc-reload-token=secret"
+    )
+
+
+def test_reload_needs_a_token(requests, monkeypatch):
+    monkeypatch.delenv("CASC_RELOAD_TOKEN")
+
+    with pytest.raises(modify_casc.ConfigurationError, match="CASC_RELOAD_TOKEN"):
+        modify_casc.reload_configuration()
+    assert requests == []
@@ -0,0 +1,15 @@
+import os
+
+from infrastructure import offline
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_committed_snapshot_loads(monkeypatch):
+    for variable in offline.INPUTS.values():
+        monkeypatch.delenv(variable, raising=False)
+
+    context = offline.load_snapshot(os.path.join(APP_DIR, offline.SNAPSHOT_FILE))
+
+    assert any(key.startswith("vpc-provider:") for key in context)
+    assert os.environ["VPC_ID"] == "vpc-0d13a9949cc7ebb5c"
@@ -0,0 +1,103 @@
+import pytest
+
+from infrastructure.jenkins_stack import JenkinsStack
+from infrastructure.storage import WORKSPACES_DIR, file_system_options
+
+from .conftest import resources
+
+
+def file_system(template: dict) -> dict:
+    (properties,) = resources(template, "AWS::EFS::FileSystem")
+    return properties
+
+
+def controller(template: dict) -> tuple:
+    """The controller task definition and its container."""
+    for task_definition in resources(template, "AWS::ECS::TaskDefinition"):
+        for container in task_definition["ContainerDefinitions"]:
+            if container["Name"] == "jenkins-controller":
+                return task_definition, container
+    raise AssertionError("no controller task definition")
+
+
+def test_bursting_by_default(synth):
+    properties = file_system(synth(JenkinsStack))
+
+    assert properties["ThroughputMode"] == "bursting"
+    assert properties["PerformanceMode"] == "generalPurpose"
+    assert "LifecyclePolicies" not in properties
+
+
+def test_provisioned_throughput(synth):
+    properties = file_system(
+        synth(JenkinsStack, efs_profile="provisioned", efs_provisioned_mibps=128)
+    )
+
+    assert properties["ThroughputMode"] == "provisioned"
+    assert properties["ProvisionedThroughputInMibps"] == 128
+
+
+def test_elastic_throughput(synth):
+    properties = file_system(synth(JenkinsStack, efs_profile="elastic"))
+
+    assert properties["ThroughputMode"] == "elastic"
+
+
+def test_max_io(synth):
+    properties = file_system(synth(JenkinsStack, efs_performance_mode="max_io"))
+
+    assert properties["PerformanceMode"] == "maxIO"
+
+
+def test_infrequent_access(synth):
+    properties = file_system(synth(JenkinsStack, efs_ia_after_days=30))
+
+    assert properties["LifecyclePolicies"] == [
+        {"TransitionToIA": "AFTER_30_DAYS"},
+        {"TransitionToPrimaryStorageClass": "AFTER_1_ACCESS"},
+    ]
+
+
+def test_infrequent_access_days_are_validated(synth):
+    with pytest.raises(ValueError):
+        synth(JenkinsStack, efs_ia_after_days=10)
+
+
+@pytest.mark.parametrize(
+    "props",
+    [
+        {"efs_profile": "fast"},
+        {"efs_performance_mode": "fast"},
+        {"efs_profile": "elastic", "efs_performance_mode": "max_io"},
+    ],
+)
+def test_invalid_options(props):
+    with pytest.raises(ValueError):
+        file_system_options(props)
+
+
+def test_workspaces_on_efs_by_default(synth):
+    task_definition, container = controller(synth(JenkinsStack))
+
+    assert [volume["Name"] for volume in task_definition["Volumes"]] == ["jenkins-efs"]
+    assert "EphemeralStorage" not in task_definition
+    java_opts = {e["Name"]: e["Value"] for e in container["Environment"]}["JAVA_OPTS"]
+    assert "workspacesDir" not in java_opts
+
+
+def test_ephemeral_workspaces(synth):
+    task_definition, container = controller(
+        synth(JenkinsStack, ephemeral_workspaces=True, controller_ephemeral_storage_gib=50)
+    )
+
+    assert task_definition["EphemeralStorage"] == {"SizeInGiB": 50}
+    assert {"Name": "jenkins-workspace"} in task_definition["Volumes"]
+    assert {
+        "ContainerPath": WORKSPACES_DIR,
+        "ReadOnly": False,
+        "SourceVolume": "jenkins-workspace",
+    } in container["MountPoints"]
+
+    java_opts = {e["Name"]: e["Value"] for e in container["Environment"]}["JAVA_OPTS"]
+    workspaces_dir = f"{WORKSPACES_DIR}/${{ITEM_FULL_NAME}}"
+    assert f"-Djenkins.model.Jenkins.workspacesDir={workspaces_dir}" in java_opts.split()
@@ -0,0 +1,113 @@
+import json
+
+from aws_cdk import core as cdk
+
+from infrastructure.jenkins_stack import JenkinsStack
+from infrastructure.wiring import tcp
+
+from .conftest import resources
+
+CLUSTER_ARN = {
+    "Fn::ImportValue": "infrastructure:ExportsOutputFnGetAttinfrastructurecluster07F92D45Arn9B96E047"
+}
+CLUSTER_TASKS = "arn:aws:ecs:us-east-1:420058945283:task/*"
+IN_CLUSTER = {"ForAnyValue:ArnEquals": {"ecs:cluster": CLUSTER_ARN}}
+
+
+def as_list(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def grants(statements: list) -> set:
+    """Every (action, resource, condition) a list of policy statements allows."""
+    return {
+        (action, json.dumps(resource, sort_keys=True), json.dumps(statement.get("Condition")))
+        for statement in statements
+        for action in as_list(statement["Action"])
+        for resource in as_list(statement["Resource"])
+    }
+
+
+def controller_statements(template: dict) -> list:
+    (policy,) = [
+        policy
+        for policy in resources(template, "AWS::IAM::Policy")
+        if any(
+            "ecs:RunTask" in as_list(statement["Action"])
+            for statement in policy["PolicyDocument"]["Statement"]
+        )
+    ]
+    return [
+        statement
+        for statement in policy["PolicyDocument"]["Statement"]
+        if not as_list(statement["Action"])[0].startswith("ssm:")
+    ]
+
+
+def test_ports_are_shared_within_a_stack():
+    app = cdk.App()
+    stack, other = cdk.Stack(app, "stack"), cdk.Stack(app, "other")
+
+    assert tcp(stack, 8080) is tcp(stack, 8080)
+    assert tcp(stack, 8080, "Jenkins Listener Port") is not tcp(stack, 8080)
+    assert tcp(other, 8080) is not tcp(stack, 8080)
+
+
+def test_merged_controller_policy_is_equivalent(synth):
+    statements = controller_statements(synth(JenkinsStack))
+
+    # The separate statements the controller role had before they were merged,
+    # without the unscoped ecs:DescribeTasks: the cluster scoped one covers the
+    # ECS plugin, which only describes its own agents' tasks.
+    expected = [
+        {
+            "Action": [
+                "ecs:RegisterTaskDefinition",
+                "ecs:DeregisterTaskDefinition",
+                "ecs:ListClusters",
+                "ecs:DescribeContainerInstances",
+                "ecs:ListTaskDefinitions",
+                "ecs:DescribeTaskDefinition",
+            ],
+            "Resource": "*",
+        },
+        {"Action": "ecs:ListContainerInstances", "Resource": CLUSTER_ARN},
+        {
+            "Action": "ecs:RunTask",
+            "Resource": "arn:aws:ecs:us-east-1:420058945283:task-definition/fargate-agents*",
+        },
+        {"Action": "ecs:StopTask", "Resource": CLUSTER_TASKS, "Condition": IN_CLUSTER},
+        {"Action": "ecs:DescribeTasks", "Resource": CLUSTER_TASKS, "Condition": IN_CLUSTER},
+        {
+            "Action": "iam:PassRole",
+            "Resource": [
+                {"Fn::GetAtt": ["AgentTaskRoleAB8558E5", "Arn"]},
+                {"Fn::GetAtt": ["AgentExecutionRole8AD76C36", "Arn"]},
+            ],
+        },
+        {
+            "Action": [
+                "logs:DescribeLogStreams",
+                "logs:FilterLogEvents",
+                "logs:CreateLogStream",
+                "logs:PutLogEvents",
+                "logs:GetLogEvents",
+            ],
+            "Resource": {"Fn::GetAtt": ["AgentLogGroupFDA72973", "Arn"]},
+        },
+        {
+            "Action": "cloudwatch:PutMetricData",
+            "Resource": "*",
+            "Condition": {"StringEquals": {"cloudwatch:namespace": "Jenkins"}},
+        },
+    ]
+    assert grants(statements) == grants(expected)
+    assert len(statements) == len(expected) - 1
+
+
+def test_describe_tasks_is_scoped_to_the_cluster(synth):
+    statements = controller_statements(synth(JenkinsStack))
+
+    (describe,) = [s for s in statements if "ecs:DescribeTasks" in as_list(s["Action"])]
+    assert describe["Resource"] == CLUSTER_TASKS
+    assert describe["Condition"] == IN_CLUSTER
@@ -1,9 +1,11 @@
+import json
 import os
 
 from aws_cdk import core
 
 from networking.networking_stack import NetworkingStack
 from networking.vpn_stack import VpnStack
+from networking import offline
 from test_stack import TestStack
 
 from dotenv import load_dotenv
@@ -14,13 +16,31 @@ networking_props = {
     "management_account": os.getenv("MANAGEMENT_ACCOUNT"),
     "root_ou": os.getenv("ROOT_OU"),
     "non_production_ou": os.getenv("NON_PRODUCTION_OU"),
-    "sandbox_ou": os.getenv("SANDBOX_OU")
+    "sandbox_ou": os.getenv("SANDBOX_OU"),
+    "vpc_endpoints": os.getenv("VPC_ENDPOINTS", "false") == "true",
+    "vpc_endpoint_subnet_groups": os.getenv(
+        "VPC_ENDPOINT_SUBNET_GROUPS", "infrastructure,jenkins"
+    ).split(","),
+    "nat_strategy": os.getenv("NAT_STRATEGY", "per_az"),
+    "nat_instance_type": os.getenv("NAT_INSTANCE_TYPE", "t3.micro"),
+    "max_azs": int(os.getenv("MAX_AZS", "2")),
+    "subnet_cidr_masks": json.loads(os.getenv("SUBNET_CIDR_MASKS", "null")),
 }
 
 
-app = core.App()
-networking = NetworkingStack(app, "networking", networking_props)
-vpn = VpnStack(app, "vpn", networking.vpc)
-test = TestStack(app, "test", networking.vpc)
+app = core.App(context=offline.load_snapshot() if offline.is_offline() else None)
 
-app.synth()
+# The AZ list and the NAT instance AMI are looked up, which needs an account and
+# region. Without them CDK would silently cap the VPC at two AZs.
+env = core.Environment(
+    account=os.getenv("CDK_DEFAULT_ACCOUNT"), region=os.getenv("CDK_DEFAULT_REGION")
+)
+
+networking = NetworkingStack(app, "networking", networking_props, env=env)
+vpn = VpnStack(app, "vpn", networking.vpc, env=env)
+test = TestStack(app, "test", networking.vpc, env=env)
+
+assembly = app.synth()
+
+if offline.is_offline():
+    offline.assert_resolved(assembly)
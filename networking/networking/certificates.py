@@ -0,0 +1,231 @@
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+
+from aws_cdk import core as cdk
+import boto3
+
+from networking.offline import StaleSnapshotError, is_offline
+
+
+class NoDomainCertificateError(Exception):
+    pass
+
+
+class CertificateBundleError(Exception):
+    pass
+
+
+_PEM_BLOCK = re.compile(
+    rb"-----BEGIN ([A-Z ]+)-----\s+(.+?)\s+-----END \1-----", re.DOTALL
+)
+
+
+def _pem_blocks(data: bytes) -> list:
+    """Returns ``(label, der)`` pairs for every PEM block in ``data``."""
+    blocks = []
+    for label, body in _PEM_BLOCK.findall(data):
+        try:
+            der = base64.b64decode(b"".join(body.split()), validate=True)
+        except ValueError:
+            raise CertificateBundleError(f"Malformed PEM block: {label.decode()}")
+        blocks.append((label.decode(), der))
+    return blocks
+
+
+def _fingerprint(certificate: bytes) -> str:
+    """SHA-256 fingerprint of the first certificate in a PEM document."""
+    for label, der in _pem_blocks(certificate):
+        if label == "CERTIFICATE":
+            return hashlib.sha256(der).hexdigest()
+    raise CertificateBundleError("No certificate found in PEM document")
+
+
+class CertificateBundle:
+    """PEM encoded certificate, private key and chain for a single domain."""
+
+    def __init__(
+        self, domain_name: str, certificate: bytes, private_key: bytes, chain: bytes
+    ) -> None:
+        self.domain_name = domain_name
+        self.certificate = certificate
+        self.private_key = private_key
+        self.chain = chain
+
+        self.__validate()
+        self.fingerprint = _fingerprint(certificate)
+
+    @classmethod
+    def from_directory(
+        cls, directory: str, domain_name: str, chain_file: str = "ca.crt"
+    ) -> "CertificateBundle":
+        """Reads ``<domain>.crt``, ``<domain>.key`` and the chain from ``directory``."""
+        return cls(
+            domain_name,
+            certificate=cls.__read(os.path.join(directory, f"{domain_name}.crt")),
+            private_key=cls.__read(os.path.join(directory, f"{domain_name}.key")),
+            chain=cls.__read(os.path.join(directory, chain_file)),
+        )
+
+    @staticmethod
+    def __read(filename: str) -> bytes:
+        try:
+            with open(filename, mode="rb") as f:
+                return f.read()
+        except OSError as error:
+            raise CertificateBundleError(f"Unable to read {filename}: {error}")
+
+    def __validate(self):
+        labels = [label for label, _ in _pem_blocks(self.certificate)]
+        if "CERTIFICATE" not in labels:
+            raise CertificateBundleError(f"{self.domain_name}: no certificate block")
+
+        labels = [label for label, _ in _pem_blocks(self.private_key)]
+        if not any(label.endswith("PRIVATE KEY") for label in labels):
+            raise CertificateBundleError(f"{self.domain_name}: no private key block")
+
+        labels = [label for label, _ in _pem_blocks(self.chain)]
+        if "CERTIFICATE" not in labels:
+            raise CertificateBundleError(f"{self.domain_name}: empty certificate chain")
+
+
+class CertificateResolver:
+    """Resolves ACM certificate ARNs by domain name.
+
+    ACM is listed once per account/region. Synth reads the domain-to-ARN index
+    from the ``cdk.context.json`` entry written by ``python -m
+    networking.certificates``, and makes no ACM calls when it is present. Synth
+    never writes the file itself: the CDK CLI owns it while the app runs.
+    """
+
+    def __init__(self, scope: cdk.Construct, client=None) -> None:
+        self._stack = cdk.Stack.of(scope)
+        self._client = client
+        self._index = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = boto3.client("acm", region_name=self.region)
+        return self._client
+
+    @property
+    def account(self) -> str:
+        if not cdk.Token.is_unresolved(self._stack.account):
+            return self._stack.account
+        account = os.getenv("CDK_DEFAULT_ACCOUNT")
+        if account is None:
+            account = boto3.client("sts").get_caller_identity()["Account"]
+        return account
+
+    @property
+    def region(self) -> str:
+        if not cdk.Token.is_unresolved(self._stack.region):
+            return self._stack.region
+        return os.getenv("CDK_DEFAULT_REGION") or boto3.session.Session().region_name
+
+    @property
+    def context_key(self) -> str:
+        return f"acm-certificates:account={self.account}:region={self.region}"
+
+    def get_certificate_arn(self, domain_name: str) -> str:
+        index = self.__load()
+        if domain_name not in index:
+            raise NoDomainCertificateError(domain_name)
+        return index[domain_name]
+
+    def refresh(self) -> dict:
+        if is_offline():
+            raise StaleSnapshotError(f"No {self.context_key} lookup in snapshot")
+
+        paginator = self.client.get_paginator("list_certificates")
+
+        index = {}
+        for page in paginator.paginate():
+            for cert in page["CertificateSummaryList"]:
+                index.setdefault(cert["DomainName"], cert["CertificateArn"])
+
+        self._index = index
+        return index
+
+    def import_certificates(self, bundles: list, max_workers: int = 4) -> dict:
+        """Imports ``bundles`` into ACM concurrently and returns their ARNs.
+
+        A bundle whose domain already has a certificate with the same
+        fingerprint is skipped; a differing one is re-imported into the
+        existing ARN instead of creating a duplicate. The index is refreshed
+        first so a stale cache cannot cause a duplicate import.
+        """
+        index = self.refresh()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            arns = executor.map(
+                lambda bundle: self.__import(bundle, index.get(bundle.domain_name)),
+                bundles,
+            )
+            result = dict(zip([bundle.domain_name for bundle in bundles], arns))
+
+        index.update(result)
+        return result
+
+    def __import(self, bundle: CertificateBundle, arn: str) -> str:
+        kwargs = {}
+        if arn is not None:
+            existing = self.client.get_certificate(CertificateArn=arn)
+            if _fingerprint(existing["Certificate"].encode()) == bundle.fingerprint:
+                return arn
+            kwargs["CertificateArn"] = arn
+
+        response = self.client.import_certificate(
+            Certificate=bundle.certificate,
+            PrivateKey=bundle.private_key,
+            CertificateChain=bundle.chain,
+            **kwargs,
+        )
+        return response["CertificateArn"]
+
+    def __load(self) -> dict:
+        if self._index is None:
+            cached = self._stack.node.try_get_context(self.context_key)
+            if cached is None:
+                self.refresh()
+                cdk.Annotations.of(self._stack).add_warning(
+                    f"{self.context_key} is not cached; run "
+                    "'python -m networking.certificates' to skip the ACM lookup"
+                )
+            else:
+                self._index = dict(cached)
+        return self._index
+
+    def save(self, context_file: str = "cdk.context.json"):
+        """Writes the index to ``context_file``. Never call this during synth."""
+        context = {}
+        if os.path.exists(context_file):
+            with open(context_file) as f:
+                context = json.load(f)
+
+        context[self.context_key] = self.__load()
+
+        with open(context_file, "w") as f:
+            json.dump(context, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Cache the ACM certificate index for synth")
+    parser.add_argument("--context-file", default="cdk.context.json")
+    args = parser.parse_args()
+
+    # Account and region come from CDK_DEFAULT_ACCOUNT/REGION or the AWS profile
+    resolver = CertificateResolver(cdk.Stack(cdk.App(), "certificates"))
+    resolver.refresh()
+    resolver.save(args.context_file)
+    print(f"Cached {resolver.context_key} in {args.context_file}")
@@ -5,31 +5,56 @@ class NetworkingStack(core.Stack):
     def __init__(self, scope: core.Construct, construct_id: str, props, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        if props.get("max_azs", 2) > 2 and core.Token.is_unresolved(self.region):
+            raise ValueError(
+                "max_azs above 2 needs a stack environment with an account and region"
+            )
+
+        cidr_masks = props.get("subnet_cidr_masks") or {}
+
         self.vpc = ec2.Vpc(
             self,
             "acme-network",
-            max_azs=2,
+            max_azs=props.get("max_azs", 2),
             cidr="10.1.0.0/16",
             subnet_configuration=[
                 ec2.SubnetConfiguration(
-                    name="public", subnet_type=ec2.SubnetType.PUBLIC, cidr_mask=24
+                    name="public",
+                    subnet_type=ec2.SubnetType.PUBLIC,
+                    cidr_mask=cidr_masks.get("public", 24),
                 ),
                 ec2.SubnetConfiguration(
                     name="infrastructure",
                     subnet_type=ec2.SubnetType.PRIVATE,
-                    cidr_mask=24,
+                    cidr_mask=cidr_masks.get("infrastructure", 24),
                 ),
                 ec2.SubnetConfiguration(
-                    name="jenkins", subnet_type=ec2.SubnetType.PRIVATE, cidr_mask=24
+                    name="jenkins",
+                    subnet_type=ec2.SubnetType.PRIVATE,
+                    cidr_mask=cidr_masks.get("jenkins", 24),
                 ),
                 ec2.SubnetConfiguration(
-                    name="gitlab", subnet_type=ec2.SubnetType.PRIVATE, cidr_mask=24
+                    name="gitlab",
+                    subnet_type=ec2.SubnetType.PRIVATE,
+                    cidr_mask=cidr_masks.get("gitlab", 24),
                 ),
             ],
+            **self.__nat_options(props),
         )
 
         core.CfnOutput(self, "VpcId", value=self.vpc.vpc_id)
 
+        # Read by deploy/deploy.py to configure the infrastructure app
+        for group in ["public", "infrastructure", "jenkins", "gitlab"]:
+            subnets = self.vpc.select_subnets(subnet_group_name=group).subnets
+            for index, subnet in enumerate(subnets, start=1):
+                core.CfnOutput(
+                    self, f"{group.capitalize()}Subnet{index}", value=subnet.subnet_id
+                )
+
+        if props.get("vpc_endpoints"):
+            self.__add_endpoints(props.get("vpc_endpoint_subnet_groups") or ["infrastructure"])
+
         private_selection = self.vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE)
         public_selection = self.vpc.select_subnets(subnet_type=ec2.SubnetType.PUBLIC)
 
@@ -54,3 +79,59 @@ class NetworkingStack(core.Stack):
             ],
             resource_arns=arns,
         )
+
+    def __nat_options(self, props) -> dict:
+        """NAT layout for the private subnets.
+
+        `per_az` puts a NAT gateway in every AZ, so private subnets never send egress
+        across AZs. `single` shares one gateway, and `instance` uses one NAT instance
+        for dev environments.
+        """
+        nat_strategy = props.get("nat_strategy", "per_az")
+
+        if nat_strategy == "per_az":
+            return {"nat_gateways": props.get("max_azs", 2)}
+        if nat_strategy == "single":
+            return {"nat_gateways": 1}
+        if nat_strategy == "instance":
+            return {
+                "nat_gateways": 1,
+                "nat_gateway_provider": ec2.NatProvider.instance(
+                    instance_type=ec2.InstanceType(
+                        props.get("nat_instance_type", "t3.micro")
+                    )
+                ),
+            }
+        raise ValueError(
+            f"nat_strategy must be one of per_az, single or instance, got '{nat_strategy}'"
+        )
+
+    def __add_endpoints(self, subnet_groups: list):
+        """Keeps ECR, S3, CloudWatch Logs, ECS and STS traffic off the NAT gateways.
+
+        VPC endpoints can't be shared through AWS RAM, but they belong to the VPC, so
+        workloads in the shared subnets of participant accounts use them as well.
+        """
+        self.vpc.add_gateway_endpoint(
+            "s3-endpoint",
+            service=ec2.GatewayVpcEndpointAwsService.S3,
+            subnets=[
+                ec2.SubnetSelection(subnet_group_name=group) for group in subnet_groups
+            ],
+        )
+
+        services = {
+            "ecr-api-endpoint": ec2.InterfaceVpcEndpointAwsService.ECR,
+            "ecr-dkr-endpoint": ec2.InterfaceVpcEndpointAwsService.ECR_DOCKER,
+            "logs-endpoint": ec2.InterfaceVpcEndpointAwsService.CLOUDWATCH_LOGS,
+            "ecs-endpoint": ec2.InterfaceVpcEndpointAwsService.ECS,
+            "sts-endpoint": ec2.InterfaceVpcEndpointAwsService.STS,
+        }
+
+        # Interface endpoints need one subnet per AZ, so they live in the first group
+        for endpoint_id, service in services.items():
+            self.vpc.add_interface_endpoint(
+                endpoint_id,
+                service=service,
+                subnets=ec2.SubnetSelection(subnet_group_name=subnet_groups[0]),
+            )
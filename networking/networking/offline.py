@@ -0,0 +1,32 @@
+"""Offline synth for the networking app; see the shared ``cdk_offline`` package.
+
+    python -m networking.offline capture
+"""
+import cdk_offline
+from cdk_offline import (  # noqa: F401
+    SNAPSHOT_FILE,
+    SNAPSHOT_VERSION,
+    StaleSnapshotError,
+    assert_resolved,
+    is_offline,
+    snapshot_path,
+)
+
+# Inputs a lookup snapshot is captured for, and the environment variables that
+# provide them
+INPUTS = {
+    "account": "CDK_DEFAULT_ACCOUNT",
+    "region": "CDK_DEFAULT_REGION",
+}
+
+
+def load_snapshot(path: str = None) -> dict:
+    return cdk_offline.load_snapshot(INPUTS, path)
+
+
+def capture_snapshot(context_file: str = "cdk.context.json", path: str = None):
+    cdk_offline.capture_snapshot(INPUTS, context_file, path)
+
+
+if __name__ == "__main__":
+    cdk_offline.main(INPUTS)
@@ -1,36 +1,31 @@
 from aws_cdk import core as cdk, aws_ec2 as ec2, aws_logs as cloudwatch_logs
-import boto3
-import botocore
-import sys
 
-
-class NoDomainCertificateError(Exception):
-    pass
+from networking.certificates import (
+    CertificateBundle,
+    CertificateResolver,
+    NoDomainCertificateError,
+)
 
 
 class VpnStack(cdk.Stack):
     def __init__(self, scope: cdk.Construct, id: str, vpc=ec2.IVpc, **kwargs) -> None:
         super().__init__(scope=scope, id=id, **kwargs)
 
+        certificates = CertificateResolver(self)
+
+        domains = ["acme.com", "client.acme.com"]
+
         try:
-            server_certificate_arn = self.__get_certificate_arn_from_acm("acme.com")
-            client_certificate_arn = self.__get_certificate_arn_from_acm(
-                "client.acme.com"
-            )
-        except botocore.exceptions.ClientError as error:
-            print(error)
+            arns = {
+                domain: certificates.get_certificate_arn(domain) for domain in domains
+            }
         except NoDomainCertificateError:
-            try:
-                self.__import_certificates()
-                server_certificate_arn = self.__get_certificate_arn_from_acm("acme.com")
-                client_certificate_arn = self.__get_certificate_arn_from_acm(
-                    "client.acme.com"
-                )
-            except botocore.exceptions.ClientError as error:
-                print(error)
-        except:
-            print("Unexpected error:", sys.exc_info()[0])
-            raise
+            arns = certificates.import_certificates(
+                [CertificateBundle.from_directory("./acm", domain) for domain in domains]
+            )
+
+        server_certificate_arn = arns["acme.com"]
+        client_certificate_arn = arns["client.acme.com"]
 
         cidr = "10.20.0.0/16"
 
@@ -60,48 +55,3 @@ class VpnStack(cdk.Stack):
             split_tunnel=True,
             log_group=log_group,
         )
-
-    def __get_certificate_arn_from_acm(self, domain_name: str) -> str:
-        acm = boto3.client("acm")
-        response = acm.list_certificates()
-        certificates = response["CertificateSummaryList"]
-
-        if len(certificates) == 0:
-            raise NoDomainCertificateError
-
-        result = [cert for cert in certificates if cert["DomainName"] == domain_name]
-        if len(result) == 0:
-            raise NoDomainCertificateError
-        return result[0]["CertificateArn"]
-
-    def __import_certificates(self):
-        certificate_authority = self.__file_content_binary("./acm/ca.crt")
-
-        server_certificate = self.__file_content_binary("./acm/acme.com.crt")
-        server_certificate_key = self.__file_content_binary("./acm/acme.com.key")
-
-        client_certificate = self.__file_content_binary("./acm/client.acme.com.crt")
-        client_certificate_key = self.__file_content_binary("./acm/client.acme.com.key")
-
-        acm = boto3.client("acm")
-
-        # import server certificate
-        acm.import_certificate(
-            Certificate=server_certificate,
-            PrivateKey=server_certificate_key,
-            CertificateChain=certificate_authority,
-        )
-
-        # import client certificate
-        acm.import_certificate(
-            Certificate=client_certificate,
-            PrivateKey=client_certificate_key,
-            CertificateChain=certificate_authority,
-        )
-
-    def __file_content_binary(self, filename: str) -> bytes:
-        try:
-            with open(filename, mode="rb") as f:
-                return f.read()
-        except Exception as e:
-            print(e)
@@ -0,0 +1,156 @@
+import base64
+import json
+
+import pytest
+from aws_cdk import core as cdk
+
+from networking.certificates import (
+    CertificateBundle,
+    CertificateResolver,
+    NoDomainCertificateError,
+)
+
+ENVIRONMENT = cdk.Environment(account="111111111111", region="us-east-1")
+CONTEXT_KEY = "acm-certificates:account=111111111111:region=us-east-1"
+
+
+def pem(label: str, body: bytes) -> bytes:
+    encoded = base64.b64encode(body).decode()
+    return f"-----BEGIN {label}-----\n{encoded}\n-----END {label}-----\n".encode()
+
+
+def bundle(domain_name: str, serial: bytes = b"1") -> CertificateBundle:
+    return CertificateBundle(
+        domain_name,
+        certificate=pem("CERTIFICATE", domain_name.encode() + serial),
+        private_key=pem("PRIVATE KEY", b"key"),
+        chain=pem("CERTIFICATE", b"ca"),
+    )
+
+
+class StubAcm:
+    """ACM client answering from `certificates`, a list of (domain, ARN, PEM) tuples."""
+
+    def __init__(self, certificates=(), page_size=1):
+        self.certificates = list(certificates)
+        self.page_size = page_size
+        self.calls = []
+
+    def get_paginator(self, operation):
+        assert operation == "list_certificates"
+        return self
+
+    def paginate(self):
+        self.calls.append("list_certificates")
+        for start in range(0, len(self.certificates), self.page_size):
+            yield {
+                "CertificateSummaryList": [
+                    {"DomainName": domain, "CertificateArn": arn}
+                    for domain, arn, _ in self.certificates[start : start + self.page_size]
+                ]
+            }
+
+    def get_certificate(self, CertificateArn):
+        self.calls.append(("get_certificate", CertificateArn))
+        (certificate,) = [c for _, arn, c in self.certificates if arn == CertificateArn]
+        return {"Certificate": certificate.decode()}
+
+    def import_certificate(self, Certificate, PrivateKey, CertificateChain, CertificateArn=None):
+        self.calls.append(("import_certificate", CertificateArn))
+        return {"CertificateArn": CertificateArn or f"arn:new:{len(self.calls)}"}
+
+
+@pytest.fixture(autouse=True)
+def online(monkeypatch):
+    monkeypatch.delenv("CDK_OFFLINE", raising=False)
+
+
+def resolver(client, context=None) -> CertificateResolver:
+    app = cdk.App(context=context)
+    return CertificateResolver(cdk.Stack(app, "stack", env=ENVIRONMENT), client)
+
+
+def test_lists_every_page():
+    client = StubAcm(
+        [
+            ("acme.com", "arn:1", pem("CERTIFICATE", b"a")),
+            ("client.acme.com", "arn:2", pem("CERTIFICATE", b"b")),
+            ("acme.com", "arn:3", pem("CERTIFICATE", b"c")),
+        ]
+    )
+
+    index = resolver(client).refresh()
+
+    # The first certificate listed for a domain wins
+    assert index == {"acme.com": "arn:1", "client.acme.com": "arn:2"}
+
+
+def test_lists_once_per_synth():
+    client = StubAcm([("acme.com", "arn:1", pem("CERTIFICATE", b"a"))])
+    certificates = resolver(client)
+
+    assert certificates.get_certificate_arn("acme.com") == "arn:1"
+    with pytest.raises(NoDomainCertificateError):
+        certificates.get_certificate_arn("client.acme.com")
+    assert client.calls == ["list_certificates"]
+
+
+def test_cached_index_makes_no_calls():
+    client = StubAcm()
+    certificates = resolver(client, {CONTEXT_KEY: {"acme.com": "arn:cached"}})
+
+    assert certificates.get_certificate_arn("acme.com") == "arn:cached"
+    assert client.calls == []
+
+
+def test_lookup_does_not_write_context(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    resolver(StubAcm([("acme.com", "arn:1", pem("CERTIFICATE", b"a"))])).refresh()
+
+    assert not (tmp_path / "cdk.context.json").exists()
+
+
+def test_save_merges_into_context_file(tmp_path):
+    context_file = tmp_path / "cdk.context.json"
+    context_file.write_text(json.dumps({"other": 1}))
+
+    certificates = resolver(StubAcm([("acme.com", "arn:1", pem("CERTIFICATE", b"a"))]))
+    certificates.save(str(context_file))
+
+    assert json.loads(context_file.read_text()) == {
+        "other": 1,
+        CONTEXT_KEY: {"acme.com": "arn:1"},
+    }
+
+
+def test_skips_certificate_with_same_fingerprint():
+    server = bundle("acme.com")
+    client = StubAcm([("acme.com", "arn:1", server.certificate)])
+
+    arns = resolver(client).import_certificates([server])
+
+    assert arns == {"acme.com": "arn:1"}
+    assert ("import_certificate", "arn:1") not in client.calls
+
+
+def test_reimports_changed_certificate_into_its_arn():
+    client = StubAcm([("acme.com", "arn:1", bundle("acme.com", b"old").certificate)])
+
+    arns = resolver(client).import_certificates([bundle("acme.com", b"new")])
+
+    assert arns == {"acme.com": "arn:1"}
+    assert ("import_certificate", "arn:1") in client.calls
+
+
+def test_imports_missing_certificates():
+    client = StubAcm([("acme.com", "arn:1", bundle("acme.com").certificate)])
+    certificates = resolver(client, {CONTEXT_KEY: {}})
+
+    arns = certificates.import_certificates([bundle("acme.com"), bundle("client.acme.com")])
+
+    # The stale cached index is refreshed before importing
+    assert client.calls[0] == "list_certificates"
+    assert arns["acme.com"] == "arn:1"
+    assert ("import_certificate", None) in client.calls
+    assert certificates.get_certificate_arn("client.acme.com") == arns["client.acme.com"]
@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+from aws_cdk import core
+
+from networking.networking_stack import NetworkingStack
+
+# Lookup answers for a placeholder account; no real account snapshot is committed
+SNAPSHOT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "lookups.snapshot.json")
+ENVIRONMENT = core.Environment(account="123456789012", region="us-east-1")
+
+PROPS = {
+    "management_account": "111111111111",
+    "root_ou": "r-test",
+    "non_production_ou": "ou-test-nonprod",
+    "sandbox_ou": "ou-test-sandbox",
+}
+
+
+def synth(env=ENVIRONMENT, **props) -> dict:
+    with open(SNAPSHOT) as f:
+        app = core.App(context=json.load(f)["context"])
+    NetworkingStack(app, "networking", {**PROPS, **props}, env=env)
+    return app.synth().get_stack_by_name("networking").template
+
+
+def by_type(template: dict, resource_type: str) -> dict:
+    return {
+        logical_id: resource.get("Properties", {})
+        for logical_id, resource in template["Resources"].items()
+        if resource["Type"] == resource_type
+    }
+
+
+def nat_azs_by_private_subnet(template: dict) -> dict:
+    """Private subnet -> (its AZ, AZ of the NAT gateway its default route uses)."""
+    subnets = by_type(template, "AWS::EC2::Subnet")
+    nat_gateways = by_type(template, "AWS::EC2::NatGateway")
+    route_tables = {
+        association["SubnetId"]["Ref"]: association["RouteTableId"]["Ref"]
+        for association in by_type(template, "AWS::EC2::SubnetRouteTableAssociation").values()
+    }
+    nat_by_route_table = {
+        route["RouteTableId"]["Ref"]: route["NatGatewayId"]["Ref"]
+        for route in by_type(template, "AWS::EC2::Route").values()
+        if "NatGatewayId" in route
+    }
+
+    result = {}
+    for subnet_id, subnet in subnets.items():
+        if subnet.get("MapPublicIpOnLaunch"):
+            continue
+        nat_gateway = nat_gateways[nat_by_route_table[route_tables[subnet_id]]]
+        nat_subnet = subnets[nat_gateway["SubnetId"]["Ref"]]
+        result[subnet_id] = (subnet["AvailabilityZone"], nat_subnet["AvailabilityZone"])
+    return result
+
+
+def test_per_az_nat_gateway_for_every_az():
+    template = synth(nat_strategy="per_az", max_azs=3)
+
+    assert len(by_type(template, "AWS::EC2::NatGateway")) == 3
+    routes = nat_azs_by_private_subnet(template)
+    # infrastructure, jenkins and gitlab subnets in each AZ
+    assert len(routes) == 9
+    assert {az for az, _ in routes.values()} == {"us-east-1a", "us-east-1b", "us-east-1c"}
+    for subnet_az, nat_az in routes.values():
+        assert subnet_az == nat_az
+
+
+def test_single_nat_gateway_is_shared():
+    template = synth(nat_strategy="single", max_azs=2)
+
+    assert len(by_type(template, "AWS::EC2::NatGateway")) == 1
+    assert len({nat_az for _, nat_az in nat_azs_by_private_subnet(template).values()}) == 1
+
+
+def test_more_than_two_azs_needs_an_environment():
+    with pytest.raises(ValueError, match="max_azs"):
+        synth(env=None, max_azs=3)
+
+
+def test_unknown_nat_strategy():
+    with pytest.raises(ValueError, match="nat_strategy"):
+        synth(nat_strategy="none")
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from networking import offline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    for variable in offline.INPUTS.values():
+        monkeypatch.delenv(variable, raising=False)
+
+    def write(inputs, context=None, version=offline.SNAPSHOT_VERSION):
+        path = tmp_path / "lookups.snapshot.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "version": version,
+                    "captured_at": "2026-10-18T00:00:00+00:00",
+                    "inputs": inputs,
+                    "context": context or {},
+                }
+            )
+        )
+        return str(path)
+
+    return write
+
+
+def test_unset_inputs_are_taken_from_snapshot(snapshot):
+    path = snapshot({"account": "111111111111", "region": "us-east-1"}, {"key": "value"})
+
+    assert offline.load_snapshot(path) == {"key": "value"}
+    assert os.environ["CDK_DEFAULT_ACCOUNT"] == "111111111111"
+
+
+def test_different_input_is_stale(snapshot, monkeypatch):
+    path = snapshot({"account": "111111111111", "region": "us-east-1"})
+    monkeypatch.setenv("CDK_DEFAULT_REGION", "eu-west-1")
+
+    with pytest.raises(offline.StaleSnapshotError, match="region=us-east-1"):
+        offline.load_snapshot(path)
+
+
+def test_missing_input_is_stale(snapshot):
+    path = snapshot({"account": "111111111111"})
+
+    with pytest.raises(offline.StaleSnapshotError, match="snapshot missing input region"):
+        offline.load_snapshot(path)
+
+
+def test_unsupported_version_is_stale(snapshot):
+    path = snapshot({"account": "111111111111", "region": "us-east-1"}, version=0)
+
+    with pytest.raises(offline.StaleSnapshotError, match="snapshot version 0"):
+        offline.load_snapshot(path)
+
+
+def test_missing_snapshot_fails(tmp_path):
+    with pytest.raises(offline.StaleSnapshotError, match="No lookup snapshot"):
+        offline.load_snapshot(str(tmp_path / offline.SNAPSHOT_FILE))
+
+
+def test_fixture_snapshot_loads(monkeypatch):
+    for variable in offline.INPUTS.values():
+        monkeypatch.delenv(variable, raising=False)
+
+    path = os.path.join(ROOT, "networking", "tests", offline.SNAPSHOT_FILE)
+    context = offline.load_snapshot(path)
+
+    assert any(key.startswith("acm-certificates:") for key in context)
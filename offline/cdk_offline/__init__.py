@@ -0,0 +1,121 @@
+"""Offline synth from a versioned snapshot of context lookups.
+
+With ``CDK_OFFLINE=1`` the app reads every lookup result (VPCs, ACM
+certificates, availability zones, ...) from ``lookups.snapshot.json`` instead
+of AWS. The snapshot is captured once from a ``cdk.context.json`` populated by
+a live synth, from the app directory:
+
+    cdk synth && python -m <package>.offline capture
+
+The networking and infrastructure apps both use this package. Each app's
+``offline`` module passes in the inputs its snapshots are captured for: a
+mapping of input name to the environment variable that provides it.
+"""
+from datetime import datetime, timedelta, timezone
+import argparse
+import json
+import os
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FILE = "lookups.snapshot.json"
+
+
+class StaleSnapshotError(Exception):
+    pass
+
+
+def is_offline() -> bool:
+    return os.getenv("CDK_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def snapshot_path() -> str:
+    return os.getenv("CDK_OFFLINE_SNAPSHOT", SNAPSHOT_FILE)
+
+
+def load_snapshot(inputs: dict, path: str = None) -> dict:
+    """Returns the snapshot context, failing fast if it is stale.
+
+    Inputs that are unset in the environment are taken from the snapshot, so
+    the app needs neither credentials nor a default account to synthesize.
+    """
+    path = path or snapshot_path()
+    if not os.path.exists(path):
+        raise StaleSnapshotError(f"No lookup snapshot at {path}")
+
+    with open(path) as f:
+        snapshot = json.load(f)
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise StaleSnapshotError(
+            f"{path}: snapshot version {snapshot.get('version')}, expected {SNAPSHOT_VERSION}"
+        )
+
+    for name, variable in inputs.items():
+        expected = snapshot["inputs"].get(name)
+        actual = os.getenv(variable)
+        if expected is None:
+            raise StaleSnapshotError(f"{path}: snapshot missing input {name}")
+        if actual is None:
+            os.environ[variable] = expected
+        elif actual != expected:
+            raise StaleSnapshotError(
+                f"{path}: captured for {name}={expected}, but {variable}={actual}"
+            )
+
+    max_age_days = os.getenv("CDK_OFFLINE_MAX_AGE_DAYS")
+    if max_age_days is not None:
+        captured_at = datetime.fromisoformat(snapshot["captured_at"])
+        if datetime.now(timezone.utc) - captured_at > timedelta(days=int(max_age_days)):
+            raise StaleSnapshotError(
+                f"{path}: captured at {snapshot['captured_at']}, older than {max_age_days} days"
+            )
+
+    return snapshot["context"]
+
+
+def assert_resolved(assembly):
+    """Raises when the synthesized assembly still needs context lookups."""
+    with open(os.path.join(assembly.directory, "manifest.json")) as f:
+        missing = json.load(f).get("missing", [])
+
+    if missing:
+        keys = ", ".join(entry["key"] for entry in missing)
+        raise StaleSnapshotError(f"Lookups missing from snapshot: {keys}")
+
+
+def capture_snapshot(inputs: dict, context_file: str = "cdk.context.json", path: str = None):
+    path = path or snapshot_path()
+    with open(context_file) as f:
+        context = json.load(f)
+
+    values = {}
+    for name, variable in inputs.items():
+        values[name] = os.getenv(variable)
+        if values[name] is None:
+            raise SystemExit(f"{variable} must be set to capture a snapshot")
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "captured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "inputs": values,
+        "context": context,
+    }
+
+    with open(path, "w") as f:
+        json.dump(snapshot, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(inputs: dict, argv: list = None):
+    """Command line of each app's ``python -m <package>.offline``."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Capture context lookups for offline synth")
+    parser.add_argument("command", choices=["capture"])
+    parser.add_argument("--context-file", default="cdk.context.json")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    capture_snapshot(inputs, args.context_file, args.output)
@@ -0,0 +1,15 @@
+import setuptools
+
+
+setuptools.setup(
+    name="cdk-offline",
+    version="0.0.1",
+
+    description="Offline synth from lookup snapshots, shared by the CDK apps",
+
+    author="author",
+
+    packages=["cdk_offline"],
+
+    python_requires=">=3.6",
+)